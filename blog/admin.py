@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 from .models import TrendingTopic, BlogPost, AdPlacement, ContentPerformanceLog
 
 @admin.register(TrendingTopic)
@@ -13,6 +15,7 @@ class BlogPostAdmin(admin.ModelAdmin):
     list_display = ('title', 'template_type', 'status', 'created_at', 'published_at', 'view_count')
     list_filter = ('status', 'template_type', 'created_at', 'published_at')
     search_fields = ('title', 'content', 'meta_description')
+    list_select_related = ('trending_topic',)
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'created_at'
     readonly_fields = ('id', 'created_at', 'updated_at', 'view_count', 'avg_time_on_page')
@@ -34,14 +37,26 @@ class BlogPostAdmin(admin.ModelAdmin):
     actions = ['publish_posts', 'archive_posts']
     
     def publish_posts(self, request, queryset):
-        for post in queryset:
-            post.publish()
-        self.message_user(request, f"{queryset.count()} posts were published successfully.")
+        # Single UPDATE instead of a save() per post; already published posts keep their date.
+        # Rows another admin is publishing right now are locked, so they are skipped, not published twice.
+        with transaction.atomic():
+            post_ids = list(
+                queryset.select_related(None)
+                .select_for_update(skip_locked=True)
+                .exclude(status='published')
+                .values_list('pk', flat=True)
+            )
+            # update() skips auto_now, so updated_at is set explicitly
+            now = timezone.now()
+            updated = BlogPost.objects.filter(pk__in=post_ids).update(
+                status='published', published_at=now, updated_at=now
+            )
+        self.message_user(request, f"{updated} posts were published successfully.")
     publish_posts.short_description = "Publish selected posts"
     
     def archive_posts(self, request, queryset):
-        queryset.update(status='archived')
-        self.message_user(request, f"{queryset.count()} posts were archived successfully.")
+        updated = queryset.update(status='archived')
+        self.message_user(request, f"{updated} posts were archived successfully.")
     archive_posts.short_description = "Archive selected posts"
 
 @admin.register(AdPlacement)
@@ -54,5 +69,6 @@ class AdPlacementAdmin(admin.ModelAdmin):
 class ContentPerformanceLogAdmin(admin.ModelAdmin):
     list_display = ('blog_post', 'timestamp', 'views', 'avg_time_on_page', 'bounce_rate')
     list_filter = ('timestamp',)
+    list_select_related = ('blog_post',)
     date_hierarchy = 'timestamp'
     readonly_fields = ('blog_post', 'timestamp', 'views', 'avg_time_on_page', 'bounce_rate', 'conversion_rate')
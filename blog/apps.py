@@ -2,27 +2,37 @@ from django.apps import AppConfig
 import sys
 import io
 import os
-from django.template import engines
+import functools
+from django.template import engines, TemplateDoesNotExist
 from django.template.loaders.filesystem import Loader as FileSystemLoader
 
+@functools.lru_cache(maxsize=512)
+def _read_template_source(path, mtime, charset):
+    """
+    Read a template file once and decode it in memory
+    
+    Cached per (path, mtime), so unchanged templates are not re-read on every render.
+    """
+    with open(path, 'rb') as fp:
+        raw = fp.read()
+    
+    try:
+        return raw.decode(charset)
+    except UnicodeDecodeError:
+        # Fall back to legacy Windows encodings; latin-1 decodes any byte sequence
+        try:
+            return raw.decode('cp1252')
+        except UnicodeDecodeError:
+            return raw.decode('latin-1')
+
 # Patch Django's FileSystemLoader to handle encoding issues
 class EncodingAwareFileSystemLoader(FileSystemLoader):
     def get_contents(self, origin):
         try:
-            # First try the default behavior
-            return super().get_contents(origin)
-        except UnicodeDecodeError as e:
-            # If that fails, try with different encodings
-            for encoding in ['cp1252', 'latin-1', 'iso-8859-1']:
-                try:
-                    with open(origin.name, encoding=encoding) as fp:
-                        return fp.read()
-                except UnicodeDecodeError:
-                    continue
-            
-            # If all encodings fail, try with replacement
-            with open(origin.name, encoding='utf-8', errors='replace') as fp:
-                return fp.read()
+            mtime = os.path.getmtime(origin.name)
+        except FileNotFoundError:
+            raise TemplateDoesNotExist(origin)
+        return _read_template_source(origin.name, mtime, self.engine.file_charset)
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -34,9 +44,11 @@ class BlogConfig(AppConfig):
         This ensures Celery discovers the automation tasks
         Also standardizes blog templates and fixes encoding
         """
-        # Set UTF-8 as the default encoding for standard output
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8-sig')
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8-sig')
+        # Set UTF-8 as the default encoding for standard output (once - don't re-wrap)
+        if sys.stdout.encoding and sys.stdout.encoding.lower() not in ('utf-8', 'utf-8-sig'):
+            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8-sig')
+        if sys.stderr.encoding and sys.stderr.encoding.lower() not in ('utf-8', 'utf-8-sig'):
+            sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8-sig')
         
         # Patch the template loaders to handle encoding issues
         try:
@@ -52,6 +64,8 @@ class BlogConfig(AppConfig):
         
         import blog.automation  # noqa
         
-        # Standardize blog templates
-        from blog.template_utils import standardize_templates
-        standardize_templates()
+        # Standardize blog templates only in the main runserver process or when
+        # explicitly requested, not in every Celery worker / Gunicorn fork / command
+        if os.environ.get('RUN_MAIN') == 'true' or os.environ.get('SCOOP_STANDARDIZE_TEMPLATES') == '1':
+            from blog.template_utils import standardize_templates
+            standardize_templates()
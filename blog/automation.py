@@ -1,22 +1,45 @@
 import os
 import json
+import functools
+import hashlib
 import logging
 import time
+import uuid
+from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
+from types import MappingProxyType
 import re
 
 import requests
 import google.generativeai as genai
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, IntegrityError, OperationalError
+from django.db.models import Count
+from django.db.models.functions import Lower
 from django.utils import timezone
-from celery import shared_task
+from django.utils.text import slugify
+from celery import chain, chord, group, shared_task, current_task
 
 from .models import TrendingTopic, BlogPost
 from .blog_ai import GeminiChatbot
 from .tasks import fetch_trending_topics, format_json_to_html
 from .logger import BlogProcessLogger
 
+# Prefer orjson for parsing large Gemini responses; its JSONDecodeError subclasses json's
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Optional tolerant parser tried before the aggressive repair
+try:
+    import json5
+except ImportError:
+    json5 = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -26,6 +49,274 @@ if hasattr(settings, 'GEMINI_API_KEY') and settings.GEMINI_API_KEY:
 else:
     logger.warning("GEMINI_API_KEY not configured in settings")
 
+# Tokenizer used to normalize keywords for the semantic prompt cache
+_KEYWORD_TOKEN_RE = re.compile(r'\w+')
+
+# JSON extraction from Gemini responses
+# One pattern for ```json and bare ``` fences around an object
+_JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+_JSON_SCAN_RE = re.compile(r'[{}"\\]')
+
+# Finds the end of a well-formed object at C speed before falling back to _JsonObjectScanner
+_JSON_RAW_DECODER = json.JSONDecoder()
+
+# Streamed responses that have not opened a JSON object after this many characters are abandoned
+_STREAM_JSON_START_LIMIT = 2000
+
+# Keyword rules for the local template classifier, checked in order
+TEMPLATE_RULES = [
+    (re.compile(r'\bhow to\b|\btutorial\b|\bguide\b', re.I), 'how_to'),
+    (re.compile(r'\bvs\.?(?!\w)|\bversus\b|\bbest\b|\breview\b|\bcompare\b', re.I), 'comparison'),
+    (re.compile(r'\bnear me\b', re.I), 'local'),
+    (re.compile(r'\bin [A-Z][a-z]+\b'), 'local'),  # "... in Boston" - case-sensitive on purpose
+    (re.compile(r'\bbreaking\b|\btrending\b|\bnews\b|\b20\d\d\b', re.I), 'trend'),
+]
+
+# Template choice requested alongside the topic choice for fresh variants (one round-trip)
+TEMPLATE_INFO_BLOCK = """Also choose the most appropriate blog template for the selected topic from our template library.
+You MUST choose one of our 5 blog templates. Each template has a specific structure and purpose.
+
+TEMPLATE INFORMATION:
+- Template 1: Evergreen Pillar Page Structure - For comprehensive, authoritative content on broad topics that remains relevant over time
+- Template 2: Trending SEO Blog Structure - For timely, trending topics that need immediate coverage with latest information 
+- Template 3: Comparison/Review Blog Structure - For comparing products, services, or approaches with pros/cons
+- Template 4: Local SEO Blog Template - For location-specific content targeting local audiences
+- Template 5: How-To Guide SEO Blog Template - For step-by-step instructional content and tutorials
+
+IMPORTANT: The template_type field MUST be one of these exact values: "template1", "template2", "template3", "template4", or "template5"."""
+
+# Template number chosen by Gemini -> BlogPost template type
+_TEMPLATE_TYPE_MAPPING = MappingProxyType({
+    'template1': 'evergreen',
+    'template2': 'trend',
+    'template3': 'comparison',
+    'template4': 'local',
+    'template5': 'how_to'
+})
+
+# Display names of previously used templates in fresh-content prompts
+_TEMPLATE_DISPLAY_NAMES = MappingProxyType({
+    'how_to': 'How-To Guide',
+    'listicle': 'Listicle',
+    'news': 'News Article',
+    'review': 'Review',
+    'opinion': 'Opinion/Editorial'
+})
+
+# System prompts of the pipeline's Gemini calls (sent per call to the shared chatbot)
+_SELECTION_SYSTEM_PROMPT = "You are a helpful AI assistant for a blog platform that specializes in selecting trending topics for blog posts."
+_CONTENT_SYSTEM_PROMPT = "You are a professional blog content creator specializing in creating in-depth, SEO-optimized content."
+
+# Fixed part of the content-generation prompt, sent as Gemini cached content when available
+_CONTENT_GUIDELINES = """IMPORTANT GUIDELINES:
+1. Create at least 5 comprehensive sections with detailed content
+2. Include at least 2-3 subsections per section where appropriate
+3. Ensure all content is factual, well-researched, and valuable to readers
+4. Include statistics, examples, and actionable advice where relevant
+5. Create at least 4-5 relevant FAQ items with thorough answers
+6. Naturally incorporate the keyword and related terms throughout the content
+7. Focus on providing genuine value, not just keyword stuffing
+8. Ensure the overall word count is substantial (2000+ words equivalent)
+9. Write in a conversational yet authoritative tone
+10. CRITICAL: Ensure the JSON is properly formatted and valid - check all brackets, commas, and quotes"""
+
+# TrendingTopic columns the pipeline reads; processed and filtered_out are also covered by tt_recent_idx
+_TOPIC_FIELDS = ('id', 'keyword', 'timestamp', 'processed', 'filtered_out')
+
+# Shape of generated blog content, checked once after parsing so format_json_to_html
+# never meets a wrong type: (field, type, list item type, required)
+_CONTENT_SCHEMA = (
+    ('title', str, None, True),
+    ('sections', list, dict, True),
+    ('meta_description', str, None, False),
+    ('table_of_contents', list, str, False),
+    ('faq', list, dict, False),
+)
+
+def _normalize_keyword(keyword):
+    """Normalize a keyword so near-duplicates ("iPhone-16 Review" / "review iphone 16") match"""
+    return ' '.join(sorted(set(_KEYWORD_TOKEN_RE.findall(keyword.lower()))))
+
+def _gemini_cache_keys(namespace, chatbot, prompt, semantic_key=None, system_prompt=None):
+    """Build the exact-match key and, optionally, the keyword-level semantic key"""
+    # Everything besides the prompt that shapes the response: model, sampling and system prompt
+    system_prompt = system_prompt or chatbot.system_prompt
+    system_digest = hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:16]
+    model_tag = f"{chatbot.model_name}|{chatbot.temperature}|{system_digest}"
+    exact_digest = hashlib.sha256(f"{namespace}|{model_tag}|{prompt}".encode('utf-8')).hexdigest()
+    cache_keys = [f"gemini:{namespace}:exact:{exact_digest}"]
+    
+    if semantic_key:
+        # Lists keep their order (e.g. numbered topic lists), each item is normalized
+        if isinstance(semantic_key, (list, tuple)):
+            normalized = '|'.join(_normalize_keyword(k) for k in semantic_key)
+        else:
+            normalized = _normalize_keyword(semantic_key)
+        semantic_digest = hashlib.sha256(f"{namespace}|{model_tag}|{normalized}".encode('utf-8')).hexdigest()
+        cache_keys.append(f"gemini:{namespace}:semantic:{semantic_digest}")
+    
+    return cache_keys
+
+class GeminiChatError(Exception):
+    """A Gemini request failed (GeminiChatbot.chat returns an error result instead of raising)"""
+
+def _chat_text(chatbot, prompt, conversation_id, process_logger, stream=False, **chat_kwargs):
+    """
+    Send a prompt to Gemini and return the response text
+    
+    With stream=True the response is streamed and reading stops as soon as the top-level
+    JSON object is complete; on a streaming error it falls back to the blocking call.
+    
+    Raises:
+        GeminiChatError: If the blocking call fails, so the apology text it returns
+        is never parsed or cached as a response
+    """
+    if stream:
+        try:
+            return _collect_streamed_json(chatbot.chat_stream(prompt, conversation_id, **chat_kwargs), process_logger)
+        except Exception as e:
+            process_logger.warning(f"Streaming response failed, falling back to blocking call: {e}")
+            # Drop any partial turn the failed stream recorded
+            chatbot.clear_conversation(conversation_id)
+    
+    response = chatbot.chat(prompt, conversation_id, **chat_kwargs)
+    if response.get('error'):
+        raise GeminiChatError(response['error'])
+    return response.get('response', '')
+
+def _collect_streamed_json(chunks, process_logger):
+    """
+    Accumulate streamed response chunks until the top-level JSON object closes
+    
+    Fails fast on malformed output: a response that has not opened a JSON object within
+    _STREAM_JSON_START_LIMIT characters is abandoned instead of generated to the end.
+    """
+    scanner = _JsonObjectScanner()
+    parts = []
+    received = 0
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            if scanner.feed(chunk) != -1:
+                process_logger.info("JSON object complete, closing response stream")
+                break
+            if not scanner.started:
+                received += len(chunk)
+                if received > _STREAM_JSON_START_LIMIT:
+                    process_logger.warning(f"No JSON object in the first {received} characters, closing response stream")
+                    break
+    finally:
+        chunks.close()
+    return ''.join(parts)
+
+def cached_chat(chatbot, prompt, conversation_id, namespace, process_logger, semantic_key=None, stream=False, **chat_kwargs):
+    """
+    Sends a prompt to Gemini, serving repeat and near-duplicate prompts from the cache
+    
+    Args:
+        chatbot: The GeminiChatbot instance
+        prompt: The prompt to send
+        conversation_id: Conversation ID used on a cache miss
+        namespace: Cache namespace for the task (e.g. "select_topic", "content:how_to")
+        process_logger: The process logger instance
+        semantic_key: Optional keyword (or ordered list of keywords) used for near-duplicate matching
+        stream: Whether to stream the response on a cache miss (see _chat_text)
+        **chat_kwargs: Extra keyword arguments passed to chatbot.chat() / chatbot.chat_stream()
+        
+    Returns:
+        tuple: (response_text, cache_keys) - pass cache_keys to cache_gemini_response()
+        once the response has been parsed successfully
+    """
+    if not getattr(settings, 'GEMINI_CACHE_ENABLED', False):
+        return _chat_text(chatbot, prompt, conversation_id, process_logger, stream, **chat_kwargs), []
+    
+    # A static preamble sent as cached context is part of the request, so it is part of the key
+    cache_keys = _gemini_cache_keys(
+        namespace, chatbot, chat_kwargs.get('cached_context', '') + prompt, semantic_key,
+        system_prompt=chat_kwargs.get('system_prompt_override')
+    )
+    try:
+        cached = cache.get_many(cache_keys)
+    except Exception as e:
+        process_logger.warning(f"Gemini cache lookup failed: {e}")
+        cached = {}
+    
+    for cache_key in cache_keys:
+        if cache_key in cached:
+            process_logger.info(f"Gemini cache hit for {namespace}", {"cache_key": cache_key})
+            return cached[cache_key], []
+    
+    process_logger.info(f"Gemini cache miss for {namespace}")
+    return _chat_text(chatbot, prompt, conversation_id, process_logger, stream, **chat_kwargs), cache_keys
+
+def cache_gemini_response(cache_keys, response_text):
+    """Store a successfully parsed Gemini response under all of its cache keys"""
+    if not cache_keys:
+        return
+    
+    try:
+        cache.set_many(
+            {cache_key: response_text for cache_key in cache_keys},
+            getattr(settings, 'GEMINI_CACHE_TTL', 60 * 60 * 24)
+        )
+    except Exception as e:
+        logger.warning("Failed to store Gemini response in cache: %s", e)
+
+@functools.lru_cache(maxsize=4)
+def _get_chatbot(model_name="gemini-1.5-pro", temperature=0.7, max_output_tokens=2048):
+    """
+    Get the GeminiChatbot shared by all pipeline calls with this model configuration
+    
+    Each call passes its own system prompt (system_prompt_override), so topic selection and
+    content generation share one instance. Callers must clear their conversation when done.
+    """
+    return GeminiChatbot(
+        model_name=model_name,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens
+    )
+
+def get_recent_topics_queryset(lookback_hours=1):
+    """
+    Unprocessed, unfiltered trending topics from the lookback window, newest first
+    
+    Only the columns used by the pipeline are loaded.
+    """
+    return TrendingTopic.objects.filter(
+        timestamp__gte=timezone.now() - timedelta(hours=lookback_hours),
+        processed=False,
+        filtered_out=False
+    ).only(*_TOPIC_FIELDS).order_by('-timestamp')
+
+def _walk_strings(value):
+    """Yield every string leaf of nested dicts/lists (dict values only, not keys)"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _walk_strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _walk_strings(item)
+
+def _estimate_content_length(blog_content):
+    """
+    Estimate the size of generated blog content without serializing it
+    
+    Counts the characters of all text in the content, which is what the JSON length
+    was used to approximate in the logs.
+    
+    Args:
+        blog_content (dict): The generated content data
+        
+    Returns:
+        int: Approximate content length in characters
+    """
+    return sum(len(text) for text in _walk_strings(blog_content))
+
+# Transient failures (dropped database connections, network errors) retried by the pipeline steps
+_PIPELINE_RETRY_EXCEPTIONS = (OperationalError, requests.exceptions.RequestException)
+
 @shared_task
 def run_blog_automation_pipeline(lookback_hours=1):
     """
@@ -35,6 +326,11 @@ def run_blog_automation_pipeline(lookback_hours=1):
     3. Generate content for that topic
     4. Publish the blog post IMMEDIATELY
     
+    Inside a worker the stages are dispatched as a chain of small tasks
+    (fetch_trending_topics -> select_topic_step -> generate_content_step ->
+    publish_blog_post_step), so each stage can run on any worker and is retried on
+    its own. Called directly, the same steps run in-process one after another.
+    
     This task is scheduled to run every 5 minutes to ensure frequent blog publishing
     
     Args:
@@ -49,62 +345,158 @@ def run_blog_automation_pipeline(lookback_hours=1):
         step1 = process_logger.step("FETCH_TRENDING_TOPICS", "Checking for recent trending topics")
         
         # Look for topics from the last hour by default for 5-minute cycles
-        recent_topics = TrendingTopic.objects.filter(
-            timestamp__gte=timezone.now() - timedelta(hours=lookback_hours),
-            processed=False,
-            filtered_out=False
-        ).order_by('-timestamp')
+        topic_ids = list(get_recent_topics_queryset(lookback_hours).values_list('pk', flat=True)[:10])
         
-        if not recent_topics.exists():
-            process_logger.info("No recent trending topics found, fetching new ones")
-            fetch_task = fetch_trending_topics.delay()
-            process_logger.info("Fetching task started", {"task_id": fetch_task.id})
-            
-            # Give some time for the task to complete
-            time.sleep(5)  
-            
-            # Refresh our list
-            recent_topics = TrendingTopic.objects.filter(
-                timestamp__gte=timezone.now() - timedelta(hours=lookback_hours),
-                processed=False,
-                filtered_out=False
-            ).order_by('-timestamp')
+        if current_task:
+            # Already running inside a worker: hand the stages to the queue instead of
+            # holding this worker slot for the whole run
+            # The steps log this run's process ID as run_id, so a run can be traced across them
+            if topic_ids:
+                stages = [select_topic_step.s(topic_ids, run_id=process_logger.process_id)]
+            else:
+                process_logger.info("No recent trending topics found, fetching new ones first")
+                stages = [
+                    fetch_trending_topics.s(return_ids=True),
+                    select_topic_step.s(run_id=process_logger.process_id)
+                ]
+            stages += [generate_content_step.s(), publish_blog_post_step.s()]
             
-            process_logger.info("Topics refresh complete", {"topics_count": recent_topics.count()})
+            pipeline = chain(*stages).apply_async()
+            process_logger.complete_step(step1, "FETCH_TRENDING_TOPICS", {
+                "topics_count": len(topic_ids),
+                "pipeline_task_id": pipeline.id
+            })
+            process_logger.end_process("DISPATCHED", {"pipeline_task_id": pipeline.id})
+            return f"Dispatched: blog automation pipeline continues in task {pipeline.id}"
         
-        if not recent_topics.exists():
-            error_msg = "Still no trending topics available after fetching"
-            process_logger.fail_step(step1, "FETCH_TRENDING_TOPICS", error_msg)
-            process_logger.end_process("FAILED", {"reason": error_msg})
-            return f"Error: {error_msg}"
+        # Called directly (management command or script): run the steps in-process
+        if not topic_ids:
+            process_logger.info("No recent trending topics found, fetching new ones")
+            topic_ids = fetch_trending_topics(return_ids=True)
+        
+        process_logger.complete_step(step1, "FETCH_TRENDING_TOPICS", {"topics_count": len(topic_ids)})
+        run = publish_blog_post_step(generate_content_step(
+            select_topic_step(topic_ids, run_id=process_logger.process_id)
+        ))
+        
+    except Exception as e:
+        process_logger.error(f"Error in blog automation pipeline: {str(e)}")
+        process_logger.end_process("FAILED", {"error": str(e)})
+        return f"Error: {str(e)}"
+    
+    if run.get("error"):
+        process_logger.end_process("FAILED", {"reason": run["error"]})
+        return f"Error: {run['error']}"
+    
+    process_logger.success(f"Successfully created and published blog post: {run['blog_title']}")
+    process_logger.end_process("COMPLETED", {
+        "blog_id": run["blog_id"],
+        "blog_title": run["blog_title"],
+        "topic": run["keyword"],
+        "template_type": run["template_type"],
+        "fresh_strategy": run["fresh_content_strategy"]
+    })
+    
+    return f"Success: Created and published blog post with ID: {run['blog_id']}"
+
+def load_fetched_topics(topic_ids):
+    """
+    Load the usable topics among those just stored by fetch_trending_topics
+    
+    Args:
+        topic_ids: TrendingTopic primary keys (may be empty)
         
-        process_logger.complete_step(step1, "FETCH_TRENDING_TOPICS", {
-            "topics_count": recent_topics.count(),
-            "topics": [{"id": t.id, "keyword": t.keyword} for t in recent_topics[:5]]
+    Returns:
+        list: Up to 10 unprocessed TrendingTopic objects, newest first
+    """
+    if not topic_ids:
+        return []
+    return list(
+        TrendingTopic.objects.filter(pk__in=topic_ids, processed=False, filtered_out=False)
+        .only(*_TOPIC_FIELDS)
+        .order_by('-timestamp')[:10]
+    )
+
+def _should_retry_step(task, exc):
+    """
+    Whether a pipeline step should re-raise exc so Celery retries it
+    
+    Only transient errors are retried, and only while the step runs in a worker
+    with retries left; anything else is recorded in the step's run result.
+    """
+    return (
+        isinstance(exc, _PIPELINE_RETRY_EXCEPTIONS)
+        and not task.request.called_directly
+        and task.request.retries < task.max_retries
+    )
+
+def _fail_pipeline_step(process_logger, step_id, step_name, error_msg, run_id=None):
+    """
+    Record a failed pipeline step and build the run result passed down the chain
+    
+    Returns:
+        dict: Run result holding only the error and run ID, which later steps pass through
+    """
+    process_logger.fail_step(step_id, step_name, error_msg)
+    process_logger.end_process("FAILED", {"reason": error_msg, "run_id": run_id})
+    return {"error": error_msg, "run_id": run_id}
+
+def _retry_pipeline_step(process_logger, exc, run_id=None):
+    """End a step's process logger before it re-raises exc for a Celery retry, which starts a new one"""
+    process_logger.end_process("RETRYING", {"error": str(exc), "run_id": run_id})
+
+@shared_task(bind=True, autoretry_for=_PIPELINE_RETRY_EXCEPTIONS, retry_backoff=True, max_retries=3)
+def select_topic_step(self, topic_ids, run_id=None):
+    """
+    Pipeline step 2: ask Gemini to select the best topic and claim it
+    
+    Args:
+        topic_ids: Candidate TrendingTopic primary keys, from the recent topics query
+            or fetch_trending_topics(return_ids=True)
+        run_id: Process ID of the pipeline run, passed down the chain and logged by every step
+        
+    Returns:
+        dict: Run result with run_id, topic_id, keyword, template_type,
+            fresh_content_strategy and used_templates, or only an error and run_id
+    """
+    process_logger = BlogProcessLogger()
+    step2 = process_logger.step("SELECT_TOPIC", "Selecting best topic using Gemini AI")
+    locked_topic_id = None
+    
+    try:
+        recent_topics = load_fetched_topics(topic_ids)
+        if not recent_topics:
+            return _fail_pipeline_step(process_logger, step2, "SELECT_TOPIC", "No trending topics available after fetching", run_id)
+        
+        # Limit to 5 topics to make selection faster for 5-minute cycles
+        candidate_topics = recent_topics[:5]
+        process_logger.info(f"Selecting among {len(candidate_topics)} topics", {
+            "topics": [{"id": t.id, "keyword": t.keyword} for t in candidate_topics]
         })
-            
-        # Step 2: Ask Gemini to select the best topic
-        step2 = process_logger.step("SELECT_TOPIC", "Selecting best topic using Gemini AI")
         
         # Get trending topics from the last 30 minutes to check for duplication
         # For 5-minute cycles, we need a shorter window to detect duplicates
         recent_minutes = 30
-        topics_last_period = TrendingTopic.objects.filter(
-            timestamp__gte=timezone.now() - timedelta(minutes=recent_minutes),
-            processed=True
-        ).order_by('-timestamp')
+        # Count how many times each (lowercased) keyword appeared in the recent period,
+        # grouped in the database in a single query
+        topic_duplication_counts = dict(
+            TrendingTopic.objects.filter(
+                timestamp__gte=timezone.now() - timedelta(minutes=recent_minutes),
+                processed=True
+            )
+            .annotate(keyword_lower=Lower('keyword'))
+            .values_list('keyword_lower')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
         
-        # Extract unique keywords from recent topics
-        recent_keywords = list(set([t.keyword.lower() for t in topics_last_period]))
+        # Unique keywords from recent topics
+        recent_keywords = list(topic_duplication_counts)
         
         # Check if we have the same trending topics for consecutive runs
         is_duplicate_trend = False
-        topic_duplication_counts = {}
         
-        for keyword in recent_keywords:
-            # Count how many times this topic appeared in the recent period
-            count = topics_last_period.filter(keyword__iexact=keyword).count()
-            topic_duplication_counts[keyword] = count
+        for keyword, count in topic_duplication_counts.items():
             if count >= 2:  # Topic appeared in 2 or more consecutive runs
                 is_duplicate_trend = True
                 process_logger.info(f"Detected duplicate trending topic: {keyword} (appeared {count} times in last {recent_minutes} minutes)")
@@ -113,25 +505,33 @@ def run_blog_automation_pipeline(lookback_hours=1):
         
         # If we have duplication, check if a blog was already created for any of these topics
         fresh_content_strategy = None
+        topics_with_recent_blogs = None
         if is_duplicate_trend:
             # Look for blogs created in the last 1-2 hours for these keywords
             # For 5-minute runs, we're more aggressive with recency
             recent_blog_hours = 2
             
             # Find topics that already have blog posts in the last hours
-            topics_with_recent_blogs = []
-            for keyword in recent_keywords:
-                recent_blogs = BlogPost.objects.filter(
-                    trending_topic__keyword__iexact=keyword,
-                    created_at__gte=timezone.now() - timedelta(hours=recent_blog_hours)
-                )
-                
-                if recent_blogs.exists():
-                    topics_with_recent_blogs.append({
-                        "keyword": keyword,
-                        "blog_count": recent_blogs.count(),
-                        "blog_templates": list(recent_blogs.values_list('template_type', flat=True))
-                    })
+            # One query for all keywords, bucketed by lowercased keyword
+            recent_blog_templates = defaultdict(list)
+            recent_blogs = (
+                BlogPost.objects.filter(created_at__gte=timezone.now() - timedelta(hours=recent_blog_hours))
+                .annotate(keyword_lower=Lower('trending_topic__keyword'))
+                .filter(keyword_lower__in=recent_keywords)
+                .values_list('keyword_lower', 'template_type')
+            )
+            for keyword, blog_template in recent_blogs:
+                recent_blog_templates[keyword].append(blog_template)
+            
+            topics_with_recent_blogs = [
+                {
+                    "keyword": keyword,
+                    "blog_count": len(recent_blog_templates[keyword]),
+                    "blog_templates": recent_blog_templates[keyword]
+                }
+                for keyword in recent_keywords
+                if keyword in recent_blog_templates
+            ]
             
             if topics_with_recent_blogs:
                 process_logger.info(f"Found {len(topics_with_recent_blogs)} topics with recent blogs in the last {recent_blog_hours} hours")
@@ -140,81 +540,141 @@ def run_blog_automation_pipeline(lookback_hours=1):
                 fresh_content_strategy = "different_angle"
                 process_logger.info(f"Setting fresh content strategy: {fresh_content_strategy}")
         
-        # Limit to 5 topics to make selection faster for 5-minute cycles
         selected_topic, template_type = select_topic_with_gemini(
-            recent_topics[:5], 
+            candidate_topics, 
             process_logger,
-            topics_with_recent_blogs=topics_with_recent_blogs if is_duplicate_trend else None,
+            topics_with_recent_blogs=topics_with_recent_blogs,
             fresh_content_strategy=fresh_content_strategy
         )
         
         if not selected_topic:
-            error_msg = "Gemini couldn't select a topic"
-            process_logger.fail_step(step2, "SELECT_TOPIC", error_msg)
-            process_logger.end_process("FAILED", {"reason": error_msg})
-            return f"Error: {error_msg}"
-            
+            return _fail_pipeline_step(process_logger, step2, "SELECT_TOPIC", "Gemini couldn't select a topic", run_id)
+        
+        # Claim the topic so a concurrent batch run does not write about it too
+        if not acquire_topic_lock(selected_topic.id):
+            error_msg = f"Topic is already being processed by another run: {selected_topic.keyword}"
+            return _fail_pipeline_step(process_logger, step2, "SELECT_TOPIC", error_msg, run_id)
+        locked_topic_id = selected_topic.id
+        
+        # Mark this topic as processed to avoid reusing in future runs (single-column UPDATE, no signals)
+        mark_topics_processed([selected_topic.pk])
+        
+        # Get the previously used templates for this topic, for the different angle instruction
+        used_templates = []
+        if fresh_content_strategy:
+            for topic_data in topics_with_recent_blogs:
+                if topic_data["keyword"].lower() == selected_topic.keyword.lower():
+                    used_templates = topic_data["blog_templates"]
+                    break
+        
         process_logger.complete_step(step2, "SELECT_TOPIC", {
             "selected_topic": selected_topic.keyword,
             "template_type": template_type,
             "fresh_content_strategy": fresh_content_strategy
         })
+        process_logger.end_process("COMPLETED", {"topic_id": selected_topic.id, "run_id": run_id})
         
-        # Mark this topic as processed to avoid reusing in future runs
-        selected_topic.processed = True
-        selected_topic.save()
+        return {
+            "run_id": run_id,
+            "topic_id": selected_topic.id,
+            "keyword": selected_topic.keyword,
+            "template_type": template_type,
+            "fresh_content_strategy": fresh_content_strategy,
+            "used_templates": used_templates
+        }
         
-        # Step 3: Generate content for the selected topic
-        step3 = process_logger.step("GENERATE_CONTENT", "Generating blog content with Gemini AI")
+    except Exception as e:
+        if locked_topic_id:
+            release_topic_lock(locked_topic_id)
+        if _should_retry_step(self, e):
+            _retry_pipeline_step(process_logger, e, run_id)
+            raise
+        process_logger.error(f"Error selecting topic: {str(e)}")
+        return _fail_pipeline_step(process_logger, step2, "SELECT_TOPIC", str(e), run_id)
+
+@shared_task(bind=True, autoretry_for=_PIPELINE_RETRY_EXCEPTIONS, retry_backoff=True, max_retries=3)
+def generate_content_step(self, run):
+    """
+    Pipeline step 3: generate the blog content for the selected topic
+    
+    Releases the topic lock when generation fails for good.
+    
+    Args:
+        run: Run result of select_topic_step
         
-        # Check if we need to generate fresh content with a different angle
+    Returns:
+        dict: The run result with the generated content added, or only an error
+    """
+    if run.get("error"):
+        return run
+    
+    run_id = run.get("run_id")
+    process_logger = BlogProcessLogger()
+    step3 = process_logger.step("GENERATE_CONTENT", "Generating blog content with Gemini AI")
+    
+    try:
+        fresh_content_strategy = run["fresh_content_strategy"]
         if fresh_content_strategy:
-            # Get the previously used templates for this topic
-            used_templates = []
-            for topic_data in topics_with_recent_blogs:
-                if topic_data["keyword"].lower() == selected_topic.keyword.lower():
-                    used_templates = topic_data["blog_templates"]
-                    break
-                    
             process_logger.info(f"Content freshness strategy active: {fresh_content_strategy}", {
-                "previous_templates": used_templates,
-                "selected_template": template_type
+                "previous_templates": run["used_templates"],
+                "selected_template": run["template_type"]
             })
-            
-            # Generate blog with a different angle instruction
-            blog_content = generate_blog_content_with_gemini(
-                selected_topic.keyword, 
-                template_type, 
-                process_logger,
-                fresh_content_strategy=fresh_content_strategy,
-                used_templates=used_templates
-            )
-        else:
-            # Standard blog generation
-            blog_content = generate_blog_content_with_gemini(selected_topic.keyword, template_type, process_logger)
+        
+        blog_content = generate_blog_content_with_gemini(
+            run["keyword"], 
+            run["template_type"], 
+            process_logger,
+            fresh_content_strategy=fresh_content_strategy,
+            used_templates=run["used_templates"] or None
+        )
         
         if not blog_content:
-            error_msg = "Failed to generate blog content"
-            process_logger.fail_step(step3, "GENERATE_CONTENT", error_msg)
-            process_logger.end_process("FAILED", {"reason": error_msg})
-            return f"Error: {error_msg}"
+            release_topic_lock(run["topic_id"])
+            return _fail_pipeline_step(process_logger, step3, "GENERATE_CONTENT", "Failed to generate blog content", run_id)
         
         process_logger.complete_step(step3, "GENERATE_CONTENT", {
-            "content_length": len(json.dumps(blog_content)),
+            "content_length": _estimate_content_length(blog_content),
             "sections_count": len(blog_content.get("table_of_contents", []))
         })
+        process_logger.end_process("COMPLETED", {"topic_id": run["topic_id"], "run_id": run_id})
+        
+        return {**run, "content": blog_content}
         
-        # Step 4: Create and publish the blog post IMMEDIATELY
-        step4 = process_logger.step("CREATE_BLOG_POST", "Creating and IMMEDIATELY publishing blog post")
+    except Exception as e:
+        if _should_retry_step(self, e):
+            _retry_pipeline_step(process_logger, e, run_id)
+            raise
+        release_topic_lock(run["topic_id"])
+        process_logger.error(f"Error generating blog content: {str(e)}")
+        return _fail_pipeline_step(process_logger, step3, "GENERATE_CONTENT", str(e), run_id)
+
+@shared_task(bind=True, autoretry_for=_PIPELINE_RETRY_EXCEPTIONS, retry_backoff=True, max_retries=3)
+def publish_blog_post_step(self, run):
+    """
+    Pipeline step 4: create and IMMEDIATELY publish the blog post, releasing the topic lock
+    
+    Args:
+        run: Run result of generate_content_step
+        
+    Returns:
+        dict: The run result with blog_id and blog_title added (content dropped), or only an error
+    """
+    if run.get("error"):
+        return run
+    
+    run_id = run.get("run_id")
+    process_logger = BlogProcessLogger()
+    step4 = process_logger.step("CREATE_BLOG_POST", "Creating and IMMEDIATELY publishing blog post")
+    
+    try:
+        topic = TrendingTopic.objects.only(*_TOPIC_FIELDS).get(pk=run["topic_id"])
         
         # Always force immediate publishing
-        blog_post = create_blog_post(selected_topic, template_type, blog_content, process_logger, publish_now=True)
+        blog_post = create_blog_post(topic, run["template_type"], run["content"], process_logger, publish_now=True)
         
         if not blog_post:
-            error_msg = "Failed to create blog post"
-            process_logger.fail_step(step4, "CREATE_BLOG_POST", error_msg)
-            process_logger.end_process("FAILED", {"reason": error_msg})
-            return f"Error: {error_msg}"
+            release_topic_lock(run["topic_id"])
+            return _fail_pipeline_step(process_logger, step4, "CREATE_BLOG_POST", "Failed to create blog post", run_id)
         
         process_logger.complete_step(step4, "CREATE_BLOG_POST", {
             "blog_id": str(blog_post.id),
@@ -222,29 +682,179 @@ def run_blog_automation_pipeline(lookback_hours=1):
             "blog_status": blog_post.status,
             "blog_url": blog_post.slug
         })
-            
         process_logger.success(f"Successfully created and published blog post: {blog_post.title}")
-        process_logger.end_process("COMPLETED", {
-            "blog_id": str(blog_post.id),
-            "blog_title": blog_post.title,
-            "topic": selected_topic.keyword,
-            "template_type": template_type,
-            "fresh_strategy": fresh_content_strategy
-        })
+        process_logger.end_process("COMPLETED", {"blog_id": str(blog_post.id), "topic": run["keyword"], "run_id": run_id})
         
-        return f"Success: Created and published blog post with ID: {blog_post.id}"
+        release_topic_lock(run["topic_id"])
+        result = {key: value for key, value in run.items() if key != "content"}
+        return {**result, "blog_id": str(blog_post.id), "blog_title": blog_post.title}
         
     except Exception as e:
-        process_logger.error(f"Error in blog automation pipeline: {str(e)}")
+        if _should_retry_step(self, e):
+            _retry_pipeline_step(process_logger, e, run_id)
+            raise
+        release_topic_lock(run["topic_id"])
+        process_logger.error(f"Error creating blog post: {str(e)}")
+        return _fail_pipeline_step(process_logger, step4, "CREATE_BLOG_POST", str(e), run_id)
+
+def _topic_lock_key(topic_id):
+    """Cache key of the processing lock for a trending topic"""
+    return f"blog:topic_lock:{topic_id}"
+
+def acquire_topic_lock(topic_id):
+    """
+    Claim a trending topic so concurrent pipeline runs do not write about it twice
+    
+    cache.add() is an atomic SET NX EX on the Redis cache backend, so only one
+    caller gets the lock. It expires after TOPIC_LOCK_TIMEOUT in case a worker dies.
+    
+    Args:
+        topic_id: The TrendingTopic primary key
+        
+    Returns:
+        bool: True if the lock was acquired
+    """
+    return cache.add(_topic_lock_key(topic_id), os.getpid(), getattr(settings, 'TOPIC_LOCK_TIMEOUT', 3600))
+
+def release_topic_lock(topic_id):
+    """Release the processing lock for a trending topic"""
+    cache.delete(_topic_lock_key(topic_id))
+
+@shared_task
+def run_blog_automation_batch(lookback_hours=1, batch_size=5):
+    """
+    Generate blog posts for several trending topics in parallel
+    
+    Claims up to batch_size recent topics and dispatches a chord: one
+    generate_content_task per topic (spread across workers), followed by a single
+    create_posts_task that publishes the results.
+    
+    Args:
+        lookback_hours: How many hours back to look for trending topics (default: 1)
+        batch_size: Maximum number of topics to process (default: 5)
+    """
+    process_logger = BlogProcessLogger()
+    process_logger.info(f"Starting batch blog automation (lookback: {lookback_hours}h, batch size: {batch_size})")
+    claimed_ids = []
+    
+    try:
+        recent_topics = list(get_recent_topics_queryset(lookback_hours)[:batch_size * 2])
+        
+        # Skip topics another run has already claimed
+        for topic in recent_topics:
+            if len(claimed_ids) >= batch_size:
+                break
+            if acquire_topic_lock(topic.id):
+                claimed_ids.append(topic.id)
+        
+        if not claimed_ids:
+            error_msg = "No unclaimed trending topics available"
+            process_logger.end_process("FAILED", {"reason": error_msg})
+            return f"Error: {error_msg}"
+        
+        # Mark claimed topics processed up front so later runs do not select them again
+        mark_topics_processed(claimed_ids)
+        
+        result = chord(
+            group(generate_content_task.s(topic_id) for topic_id in claimed_ids)
+        )(create_posts_task.s())
+        
+        process_logger.end_process("COMPLETED", {"topic_ids": claimed_ids, "chord_id": result.id})
+        return f"Success: Dispatched blog generation for {len(claimed_ids)} topics"
+        
+    except Exception as e:
+        for topic_id in claimed_ids:
+            release_topic_lock(topic_id)
+        process_logger.error(f"Error in batch blog automation: {str(e)}")
         process_logger.end_process("FAILED", {"error": str(e)})
         return f"Error: {str(e)}"
 
+@shared_task
+def generate_content_task(topic_id, template_type=None):
+    """
+    Generate blog content for one trending topic (a member of the batch chord)
+    
+    Never raises, so one failed topic does not abort the chord callback.
+    
+    Args:
+        topic_id: The TrendingTopic primary key
+        template_type: Template to use; classified from the keyword when not given
+        
+    Returns:
+        dict: topic_id, template_type and the generated content (None on failure)
+    """
+    process_logger = BlogProcessLogger()
+    content = None
+    
+    try:
+        topic = TrendingTopic.objects.only(*_TOPIC_FIELDS).get(pk=topic_id)
+        if not template_type:
+            template_type = classify_template(topic.keyword)
+        content = generate_blog_content_with_gemini(topic.keyword, template_type, process_logger)
+    except Exception as e:
+        process_logger.error(f"Error generating content for topic {topic_id}: {str(e)}")
+    finally:
+        process_logger.end_process("COMPLETED" if content else "FAILED", {"topic_id": topic_id})
+    
+    return {"topic_id": topic_id, "template_type": template_type, "content": content}
+
+@shared_task
+def create_posts_task(results):
+    """
+    Create and publish blog posts from the batch chord results, releasing each topic lock
+    
+    Args:
+        results: List of generate_content_task results
+    """
+    process_logger = BlogProcessLogger()
+    generated = []
+    created_ids = None
+    
+    try:
+        topics = TrendingTopic.objects.only(*_TOPIC_FIELDS).in_bulk([result["topic_id"] for result in results])
+        for result in results:
+            topic = topics.get(result["topic_id"])
+            if topic and result["content"]:
+                generated.append((topic, result["template_type"], result["content"]))
+            else:
+                process_logger.warning(f"No content generated for topic {result['topic_id']}, skipping")
+        
+        blog_posts = bulk_create_blog_posts(generated, process_logger, publish_now=True)
+        created_ids = [str(blog_post.id) for blog_post in blog_posts]
+    except Exception as e:
+        process_logger.error(f"Error creating blog posts: {str(e)}")
+        raise
+    finally:
+        for result in results:
+            release_topic_lock(result["topic_id"])
+        if created_ids is None:
+            process_logger.end_process("FAILED", {"topic_ids": [result["topic_id"] for result in results]})
+        else:
+            process_logger.end_process("COMPLETED", {"blog_ids": created_ids})
+    
+    return f"Success: Created and published {len(created_ids)} blog posts"
+
+def classify_template(keyword):
+    """
+    Pick the blog template for a keyword with local rules (first match wins)
+    
+    Args:
+        keyword: The trending topic keyword
+        
+    Returns:
+        str: The BlogPost template type, 'evergreen' when no rule matches
+    """
+    for pattern, template_type in TEMPLATE_RULES:
+        if pattern.search(keyword):
+            return template_type
+    return 'evergreen'
+
 def select_topic_with_gemini(trending_topics, process_logger, topics_with_recent_blogs=None, fresh_content_strategy=None):
     """
     Uses Gemini AI to select the best topic for a blog post
     
     Args:
-        trending_topics: QuerySet of TrendingTopic objects
+        trending_topics: List of TrendingTopic objects
         process_logger: The process logger instance
         topics_with_recent_blogs: List of topics that already have recent blogs
         fresh_content_strategy: Strategy for fresh content if duplicates are detected
@@ -256,18 +866,22 @@ def select_topic_with_gemini(trending_topics, process_logger, topics_with_recent
         return None, None
     
     # Create a prompt for Gemini
-    topics_list = "\n".join([f"{i+1}. {topic.keyword}" for i, topic in enumerate(trending_topics)])
+    topics_list = "\n".join(f"{i+1}. {topic.keyword}" for i, topic in enumerate(trending_topics))
     
     # Create a conversation ID for this template selection session
     conversation_id = f"template_selection_{int(time.time())}"
     
+    # Templates are classified locally from the keyword; Gemini only picks the template for
+    # fresh variants, where it has to differ from the templates already used for the topic
+    gemini_picks_template = bool(topics_with_recent_blogs and fresh_content_strategy)
+    
     # Construct prompt based on whether we have duplicate topics
-    if topics_with_recent_blogs and fresh_content_strategy:
+    if gemini_picks_template:
         # Provide information about topics with recent blogs for Gemini to avoid
-        recent_blogs_info = "\n".join([
+        recent_blogs_info = "\n".join(
             f"- {topic['keyword']} (already has {topic['blog_count']} recent blog(s) with templates: {', '.join(topic['blog_templates'])})"
             for topic in topics_with_recent_blogs
-        ])
+        )
         
         prompt = f"""As a professional blog editor, your task is to select the best trending topic from the list below for our next blog post.
 
@@ -289,11 +903,15 @@ Consider factors like:
 - Staying power (not just a flash trend)
 - Our ability to provide unique insights
 
+{TEMPLATE_INFO_BLOCK}
+
 You must return your response in valid JSON format only:
 ```json
 {{
   "selected_topic_number": 5,
-  "reason": "This topic has high search volume and evergreen appeal...",
+  "template_number": 2,
+  "template_type": "template2",
+  "reason": "This topic has high search volume and evergreen appeal, and this template suits it because...",
   "content_approach": "Focusing on a different angle than previous posts by covering recent statistics and case studies"
 }}
 ```"""
@@ -316,38 +934,32 @@ You must return your response in valid JSON format only:
 ```json
 {{
   "selected_topic_number": 5,
-  "reason": "This topic has high search volume and evergreen appeal..."
+  "reason": "This topic has high search volume and evergreen appeal because..."
 }}
 ```"""
+    chatbot = None
     try:
-        # Initialize the Gemini chatbot with appropriate temperature
-        chatbot = GeminiChatbot(
-            model_name="gemini-1.5-pro",
-            temperature=0.7,
-            system_prompt="You are a helpful AI assistant for a blog platform that specializes in selecting trending topics for blog posts."
-        )
+        # Get the shared Gemini chatbot (the system prompt is passed per call)
+        chatbot = _get_chatbot()
         
-        # Get response from Gemini
+        # Get topic (and, for fresh variants, template) selection from Gemini in a single call
         process_logger.info("Asking Gemini to select best trending topic")
-        response = chatbot.chat(prompt, conversation_id)
-        response_text = response.get('response', '')
+        response_text, cache_keys = cached_chat(
+            chatbot, prompt, conversation_id, "select_topic", process_logger,
+            semantic_key=[topic.keyword for topic in trending_topics] if not fresh_content_strategy else None,
+            include_template_info=gemini_picks_template,
+            system_prompt_override=_SELECTION_SYSTEM_PROMPT,
+            stateless=True
+        )
         process_logger.info(f"Received response from Gemini: {response_text[:100]}...")
         
         # Extract JSON from response
         try:
             # Clean up the response to extract valid JSON
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON without the markdown code blocks
-                json_match = re.search(r'({.*})', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                else:
-                    json_str = response_text
+            json_str, _ = _extract_json(response_text)
             
-            selected_data = json.loads(json_str)
+            selected_data = _json_loads(json_str)
+            cache_gemini_response(cache_keys, response_text)
             selected_topic_number = selected_data.get('selected_topic_number')
             
             if not selected_topic_number or selected_topic_number < 1 or selected_topic_number > len(trending_topics):
@@ -362,100 +974,44 @@ You must return your response in valid JSON format only:
             if 'content_approach' in selected_data:
                 process_logger.info(f"Content approach: {selected_data['content_approach']}")
             
-            # Now ask Gemini to select the best template for this topic
-            template_prompt = f"""Now that you've selected the topic "{selected_topic.keyword}", choose the most appropriate blog template from our template library.
-
-You MUST choose one of our 5 blog templates for this topic. Each template has a specific structure and purpose.
-
-TEMPLATE INFORMATION:
-- Template 1: Evergreen Pillar Page Structure - For comprehensive, authoritative content on broad topics that remains relevant over time
-- Template 2: Trending SEO Blog Structure - For timely, trending topics that need immediate coverage with latest information 
-- Template 3: Comparison/Review Blog Structure - For comparing products, services, or approaches with pros/cons
-- Template 4: Local SEO Blog Template - For location-specific content targeting local audiences
-- Template 5: How-To Guide SEO Blog Template - For step-by-step instructional content and tutorials
-
-Based on the topic "{selected_topic.keyword}", select the SINGLE MOST APPROPRIATE template that would best present this content.
-
-You MUST return your response as valid JSON in this exact format:
-```json
-{{
-  "template_number": 2, 
-  "template_type": "template2",
-  "reason": "This template is best for this topic because..."
-}}
-```
-
-IMPORTANT: The template_type field MUST be one of these exact values: "template1", "template2", "template3", "template4", or "template5".
-"""
+            if not gemini_picks_template:
+                template_name = classify_template(selected_topic.keyword)
+                process_logger.info(f"Selected template: {template_name} (classified from keyword)")
+                return selected_topic, template_name
             
-            # Get template selection from Gemini
-            process_logger.info("Asking Gemini to select best template")
-            template_response = chatbot.chat(template_prompt, conversation_id)
-            template_text = template_response.get('response', '')
-            process_logger.info(f"Received template response from Gemini: {template_text[:100]}...")
+            # Get the template type - prioritize the explicit template_type field
+            template_type = selected_data.get('template_type')
             
-            # Extract JSON from template response
-            try:
-                # Clean up the response to extract valid JSON
-                json_match = re.search(r'```json\s*(.*?)\s*```', template_text, re.DOTALL)
-                if json_match:
-                    template_json_str = json_match.group(1)
-                else:
-                    # Try to find JSON without the markdown code blocks
-                    json_match = re.search(r'({.*})', template_text, re.DOTALL)
-                    if json_match:
-                        template_json_str = json_match.group(1)
-                    else:
-                        template_json_str = template_text
-                
-                template_data = json.loads(template_json_str)
-                
-                # Get the template type - prioritize the explicit template_type field
-                template_type = template_data.get('template_type')
-                
-                # If template_type not present, try template_number
-                if not template_type and 'template_number' in template_data:
-                    template_num = template_data.get('template_number')
-                    if isinstance(template_num, int) and 1 <= template_num <= 5:
-                        template_type = f"template{template_num}"
-                
-                # Map to actual template name used in the system
-                # Fixed mapping between template types and template names
-                template_mapping = {
-                    'template1': 'evergreen',
-                    'template2': 'trend',
-                    'template3': 'comparison',
-                    'template4': 'local',
-                    'template5': 'how_to'
-                }
-                
-                # Ensure we have a valid template type
-                if template_type not in template_mapping:
-                    process_logger.warning(f"Invalid template type: {template_type}. Using default template.")
-                    template_type = 'template5'  # Default to how-to
-                
-                template_name = template_mapping.get(template_type, 'how_to')
-                process_logger.info(f"Selected template: {template_type} (maps to: {template_name})")
-                
-            except (json.JSONDecodeError, KeyError) as e:
-                process_logger.warning(f"Error parsing template JSON: {e}. Using default template.")
-                template_name = 'how_to'  # Default to how-to template
+            # If template_type not present, try template_number
+            if not template_type and 'template_number' in selected_data:
+                template_num = selected_data.get('template_number')
+                if isinstance(template_num, int) and 1 <= template_num <= 5:
+                    template_type = f"template{template_num}"
             
-            # Clean up
-            chatbot.clear_conversation(conversation_id)
+            # Map to actual template name used in the system
+            # Fixed mapping between template types and template names
+            # Ensure we have a valid template type
+            if template_type not in _TEMPLATE_TYPE_MAPPING:
+                process_logger.warning(f"Invalid template type: {template_type}. Using default template.")
+                template_type = 'template5'  # Default to how-to
+            
+            template_name = _TEMPLATE_TYPE_MAPPING.get(template_type, 'how_to')
+            process_logger.info(f"Selected template: {template_type} (maps to: {template_name})")
             
             return selected_topic, template_name
             
         except (json.JSONDecodeError, KeyError) as e:
             process_logger.warning(f"Error parsing JSON: {e}")
-            if trending_topics:
-                return trending_topics[0], 'how_to'  # Default to first topic and how-to template
-            return None, None
+            # Default to first topic and its classified template
+            return trending_topics[0], classify_template(trending_topics[0].keyword)
     except Exception as e:
         process_logger.error(f"Error in select_topic_with_gemini: {e}")
-        if trending_topics:
-            return trending_topics[0], 'how_to'  # Default to first topic and how-to template
-        return None, None
+        # Default to first topic and its classified template
+        return trending_topics[0], classify_template(trending_topics[0].keyword)
+    finally:
+        # Clean up - the chatbot is shared, so per-run conversation state must not leak
+        if chatbot:
+            chatbot.clear_conversation(conversation_id)
 
 def generate_blog_content_with_gemini(keyword, template_type, process_logger, fresh_content_strategy=None, used_templates=None):
     """
@@ -471,6 +1027,8 @@ def generate_blog_content_with_gemini(keyword, template_type, process_logger, fr
     Returns:
         dict: The generated content data
     """
+    chatbot = None
+    conversation_id = f"blog_generation_{int(time.time())}"
     try:
         process_logger.info(f"Generating blog content for keyword: {keyword} with template: {template_type}")
         
@@ -494,15 +1052,7 @@ The goal is to create a blog that feels completely fresh even though the topic h
             
             # If we know which templates were used before, explicitly avoid them
             if used_templates:
-                template_mapping = {
-                    'how_to': 'How-To Guide',
-                    'listicle': 'Listicle',
-                    'news': 'News Article',
-                    'review': 'Review',
-                    'opinion': 'Opinion/Editorial'
-                }
-                
-                used_template_names = [template_mapping.get(t, t) for t in used_templates]
+                used_template_names = [_TEMPLATE_DISPLAY_NAMES.get(t, t) for t in used_templates]
                 fresh_content_instructions += f"\nPreviously used template types: {', '.join(used_template_names)}. Please use a DIFFERENT approach."
         
         # Generate the SEO-optimized prompt for JSON content
@@ -547,194 +1097,340 @@ You MUST return ONLY the following valid JSON structure without any additional t
   ]
 }}
 ```
-
-IMPORTANT GUIDELINES:
-1. Create at least 5 comprehensive sections with detailed content
-2. Include at least 2-3 subsections per section where appropriate
-3. Ensure all content is factual, well-researched, and valuable to readers
-4. Include statistics, examples, and actionable advice where relevant
-5. Create at least 4-5 relevant FAQ items with thorough answers
-6. Naturally incorporate the keyword and related terms throughout the content
-7. Focus on providing genuine value, not just keyword stuffing
-8. Ensure the overall word count is substantial (2000+ words equivalent)
-9. Write in a conversational yet authoritative tone
-10. CRITICAL: Ensure the JSON is properly formatted and valid - check all brackets, commas, and quotes
 """
 
-        # Initialize the Gemini chatbot with appropriate temperature
-        chatbot = GeminiChatbot(
-            model_name="gemini-1.5-pro",
-            temperature=0.7,
-            system_prompt="You are a professional blog content creator specializing in creating in-depth, SEO-optimized content."
-        )
+        # Get the shared Gemini chatbot (the system prompt is passed per call)
+        chatbot = _get_chatbot()
         
-        # Get response from Gemini
-        process_logger.info("Asking Gemini to generate blog content")
-        response = chatbot.chat(prompt, conversation_id=f"blog_generation_{int(time.time())}")
-        response_text = response.get('response', '')
+        # Fresh variants are always newly generated. Cached content is otherwise only reused
+        # while nothing has been published for the keyword, so no article is published twice
+        use_cache = not fresh_content_strategy and not _published_within_cache_ttl(keyword)
         
-        # Extract JSON from response
+        # Get response from Gemini and parse it, retrying malformed or failed responses
+        process_logger.info("Asking Gemini to generate blog content")
         try:
-            # Log the raw response for debugging (truncated for brevity)
-            process_logger.info(f"Received response with length: {len(response_text)} characters")
-            if len(response_text) > 200:
-                sample = response_text[:100] + "..." + response_text[-100:]
-                process_logger.info(f"Response sample: {sample}")
-            
-            # First attempt: Try to find JSON block with markdown code markers
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-                process_logger.info("Found JSON inside markdown code block")
-            else:
-                # Second attempt: Look for JSON in triple backticks without specifying language
-                json_match = re.search(r'```\s*({\s*".*?})\s*```', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                    process_logger.info("Found JSON inside generic code block")
-                else:
-                    # Third attempt: Find the largest JSON-like structure in the text
-                    json_match = re.search(r'({[\s\S]*})', response_text)
-                    if json_match:
-                        json_str = json_match.group(1)
-                        process_logger.info("Found JSON structure without code blocks")
-                    else:
-                        # If all else fails, try to clean the entire response
-                        json_str = response_text.strip()
-                        process_logger.info("No JSON structure found, using entire response")
-            
-            # Clean the JSON string
-            json_str = json_str.strip()
-            
-            # Fix common JSON issues that might cause parsing errors
-            json_str = fix_json_string(json_str)
-            
-            # Log first few characters of the cleaned JSON string
-            process_logger.info(f"Cleaned JSON: {json_str[:100]}...")
-            
-            # Try to parse the JSON
-            try:
-                content_data = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                process_logger.warning(f"Initial JSON parsing failed: {str(e)}")
-                
-                # Try an alternate approach to fix the JSON using a more aggressive method
-                json_str = aggressive_json_repair(json_str)
-                process_logger.info("Attempting to parse with aggressively repaired JSON")
-                content_data = json.loads(json_str)
-            
-            # Validate the content data
-            if not content_data.get('title') or not content_data.get('sections'):
-                process_logger.warning("Generated content is missing required fields")
-                return None
-                
-            # Add template type to content data
-            content_data['template_type'] = template_type
-            
-            # If using fresh content strategy, note it in the content
-            if fresh_content_strategy:
-                content_data['fresh_content_strategy'] = fresh_content_strategy
-            
-            process_logger.info(f"Successfully generated blog content with title: {content_data.get('title')}")
-            return content_data
-            
+            content_data, response_text, cache_keys = _request_blog_content(
+                chatbot, prompt, conversation_id, template_type, use_cache, process_logger
+            )
         except (json.JSONDecodeError, AttributeError) as e:
             process_logger.error(f"Failed to parse JSON from Gemini response: {str(e)}")
-            # Log a portion of the response that might contain the error
-            if len(response_text) > 1000:
-                error_location = min(8910, len(response_text) - 100)  # Around the error position we saw
-                error_context = response_text[error_location-50:error_location+50]
-                process_logger.error(f"Error context: ...{error_context}...")
-            
             return None
         
+        # Validate the content data
+        schema_error = _content_schema_error(content_data)
+        if schema_error:
+            process_logger.warning(f"Generated content does not match the blog schema: {schema_error}")
+            return None
+            
+        cache_gemini_response(cache_keys, response_text)
+        
+        # Add template type to content data
+        content_data['template_type'] = template_type
+        
+        # If using fresh content strategy, note it in the content
+        if fresh_content_strategy:
+            content_data['fresh_content_strategy'] = fresh_content_strategy
+        
+        process_logger.info(f"Successfully generated blog content with title: {content_data.get('title')}")
+        return content_data
+        
     except Exception as e:
         process_logger.error(f"Error generating blog content: {str(e)}")
         return None
+    finally:
+        if chatbot:
+            chatbot.clear_conversation(conversation_id)
+
+def _content_schema_error(content_data):
+    """
+    Check parsed blog content against _CONTENT_SCHEMA
+    
+    Returns:
+        str: Why the content cannot be published, or None when it matches
+    """
+    if not isinstance(content_data, dict):
+        return f"expected a JSON object, got {type(content_data).__name__}"
+    
+    for field, field_type, item_type, required in _CONTENT_SCHEMA:
+        value = content_data.get(field)
+        if not value:
+            if required:
+                return f"missing required field '{field}'"
+            continue
+        if not isinstance(value, field_type):
+            return f"'{field}' should be a {field_type.__name__}"
+        if item_type and not all(isinstance(item, item_type) for item in value):
+            return f"'{field}' items should be {item_type.__name__} values"
+    
+    return None
 
-def fix_json_string(json_str):
+@retry(
+    stop=stop_after_attempt(2),
+    wait=wait_exponential(multiplier=1, min=1, max=8),
+    retry=retry_if_exception_type((json.JSONDecodeError, requests.exceptions.RequestException, GeminiChatError)),
+    reraise=True
+)
+def _published_within_cache_ttl(keyword):
+    """Whether a blog post for this keyword was created within GEMINI_CACHE_TTL (False when caching is off)"""
+    if not getattr(settings, 'GEMINI_CACHE_ENABLED', False):
+        return False
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'GEMINI_CACHE_TTL', 60 * 60 * 24))
+    return BlogPost.objects.alias(
+        topic_keyword_lower=Lower('trending_topic__keyword')
+    ).filter(topic_keyword_lower=keyword.lower(), created_at__gte=cutoff).exists()
+
+def _request_blog_content(chatbot, prompt, conversation_id, template_type, use_cache, process_logger):
     """
-    Fix common JSON formatting issues
+    Ask Gemini for blog content and parse the JSON it returns
+    
+    Malformed JSON, transient request errors and failed Gemini calls are retried once with
+    exponential backoff; the last error is re-raised if the retry fails too.
+    
+    Returns:
+        tuple: (content_data, response_text, cache_keys) - cache_keys is empty unless the
+        response parsed as JSON without repair
     """
-    # Remove any leading/trailing non-JSON characters
-    json_str = re.sub(r'^[^{]*', '', json_str)
-    json_str = re.sub(r'[^}]*$', '', json_str)
+    # Start every attempt from a clean conversation so a failed reply is not in the history
+    chatbot.clear_conversation(conversation_id)
+    
+    if not use_cache:
+        response_text = _chat_text(
+            chatbot, prompt, conversation_id, process_logger, stream=True,
+            cached_context=_CONTENT_GUIDELINES,
+            system_prompt_override=_CONTENT_SYSTEM_PROMPT,
+            stateless=True
+        )
+        cache_keys = []
+    else:
+        # Exact prompt matches only: the keyword-only semantic tier would hand one article
+        # to every near-duplicate keyword
+        response_text, cache_keys = cached_chat(
+            chatbot, prompt, conversation_id, f"content:{template_type}", process_logger,
+            stream=True,
+            cached_context=_CONTENT_GUIDELINES,
+            system_prompt_override=_CONTENT_SYSTEM_PROMPT,
+            stateless=True
+        )
+    
+    # Log the raw response for debugging (truncated for brevity)
+    process_logger.info(f"Received response with length: {len(response_text)} characters")
+    if len(response_text) > 200:
+        sample = response_text[:100] + "..." + response_text[-100:]
+        process_logger.info(f"Response sample: {sample}")
+    
+    # Find the JSON block (markdown code block, bare object, or the entire response)
+    json_str, json_source = _extract_json(response_text)
+    if json_source == "markdown":
+        process_logger.info("Found JSON inside markdown code block")
+    elif json_source == "object":
+        process_logger.info("Found JSON structure without markdown code block")
+    else:
+        process_logger.info("No JSON structure found, using entire response")
+    
+    # Clean the JSON string
+    json_str = json_str.strip()
+    
+    # Fast path: well-formed JSON is parsed once, without any repair passes
+    # (which could also alter valid string content, e.g. "key: value" text after a comma)
+    try:
+        return _json_loads(json_str), response_text, cache_keys
+    except json.JSONDecodeError:
+        pass
+    
+    # Repaired output is used for this run but never cached: the repair passes turn
+    # anything (even an empty reply) into valid JSON, e.g. the placeholder post
+    cache_keys = []
+    
+    # Only malformed output needs the repair helpers, so they are imported here
+    from .json_repair import aggressive_json_repair, fix_json_string
+    
+    # Fix common JSON issues that might cause parsing errors
+    json_str = fix_json_string(json_str)
     
-    # Fix unclosed quotes
-    lines = json_str.split('\n')
-    fixed_lines = []
-    for line in lines:
-        # Count quotes in the line
-        quote_count = line.count('"')
-        if quote_count % 2 == 1:  # Odd number of quotes
-            # Find position of the last quote
-            last_quote_pos = line.rfind('"')
-            if last_quote_pos != -1:
-                # Add a closing quote if it seems to be missing
-                line = line[:last_quote_pos+1] + '"' + line[last_quote_pos+1:]
-        fixed_lines.append(line)
+    # Log first few characters of the cleaned JSON string
+    process_logger.info(f"Cleaned JSON: {json_str[:100]}...")
     
-    json_str = '\n'.join(fixed_lines)
+    # Try to parse the JSON
+    try:
+        content_data = _json_loads(json_str)
+    except json.JSONDecodeError as e:
+        process_logger.warning(f"Initial JSON parsing failed: {str(e)}")
+        
+        # Tolerant parse first (trailing commas, single quotes, unquoted keys, comments)
+        content_data = _json5_loads(json_str, process_logger)
+        if content_data is not None:
+            return content_data, response_text, cache_keys
+        
+        # Try an alternate approach to fix the JSON using a more aggressive method
+        json_str = aggressive_json_repair(json_str)
+        process_logger.info("Attempting to parse with aggressively repaired JSON")
+        try:
+            content_data = _json_loads(json_str)
+        except json.JSONDecodeError as e:
+            # Log the part of the repaired JSON around the position the parser reported
+            # (a 100-character slice; nothing is built when error logging is off)
+            if process_logger.isEnabledFor(logging.ERROR):
+                error_context = json_str[max(e.pos - 50, 0):e.pos + 50]
+                process_logger.error(f"Error context at position {e.pos}: ...{error_context}...")
+            raise
     
-    # Fix missing commas between objects in arrays
-    json_str = re.sub(r'}\s*{', '}, {', json_str)
+    return content_data, response_text, cache_keys
+
+def _json5_loads(json_str, process_logger):
+    """
+    Parse slightly malformed JSON with json5, when it is installed
     
-    # Fix trailing commas in arrays or objects
-    json_str = re.sub(r',\s*}', '}', json_str)
-    json_str = re.sub(r',\s*]', ']', json_str)
+    Returns:
+        The parsed data, or None when json5 is unavailable or cannot parse it either
+    """
+    if json5 is None:
+        return None
     
-    # Ensure property names are quoted
-    json_str = re.sub(r'([{,]\s*)([a-zA-Z0-9_]+)(\s*:)', r'\1"\2"\3', json_str)
+    try:
+        content_data = json5.loads(json_str)
+    except ValueError as e:
+        process_logger.warning(f"Tolerant JSON parsing failed: {str(e)}")
+        return None
     
-    return json_str
+    process_logger.info("Parsed JSON with the tolerant json5 parser")
+    return content_data
 
-def aggressive_json_repair(json_str):
+class _JsonObjectScanner:
     """
-    More aggressive JSON repair for severely malformed JSON strings
+    Incremental brace-depth scanner for the first top-level JSON object
+    
+    Braces inside JSON strings are ignored. Only structural characters are visited, so
+    the scan is linear, cannot backtrack, and its state carries across streamed chunks.
     """
-    # Remove common text that might appear before or after the JSON
-    cleaned = re.sub(r'.*?({.*})[^}]*$', r'\1', json_str, flags=re.DOTALL)
     
-    # If the JSON is still severely malformed, build a minimal valid structure
-    if not is_valid_json(cleaned):
-        # Extract whatever content we can and create a minimal blog structure
-        title_match = re.search(r'"title"\s*:\s*"([^"]+)"', cleaned)
-        title = title_match.group(1) if title_match else "Generated Blog Post"
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.started = False
+        self._skip = 0  # Escaped characters to skip at the start of the next chunk
+    
+    def feed(self, chunk):
+        """Scan the next chunk; returns the index in chunk where the object closed, or -1"""
+        skip_to = self._skip
+        self._skip = 0
+        for match in _JSON_SCAN_RE.finditer(chunk):
+            pos = match.start()
+            if pos < skip_to:
+                continue
+            char = match.group()
+            if not self.started:
+                # Ignore everything before the opening brace
+                if char != '{':
+                    continue
+                self.started = True
+            if self.in_string:
+                if char == '\\':
+                    skip_to = pos + 2  # Skip the escaped character
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return pos
         
-        meta_match = re.search(r'"meta_description"\s*:\s*"([^"]+)"', cleaned)
-        meta = meta_match.group(1) if meta_match else "Generated blog post with minimal content"
+        self._skip = max(0, skip_to - len(chunk))
+        return -1
+
+def _find_json_object(text):
+    """Find the first balanced JSON object in text with a single brace-depth scan"""
+    start = text.find('{')
+    if start == -1:
+        return None
+    
+    # Well-formed output: the C decoder finds where the object ends without a Python-level scan
+    try:
+        end = _JSON_RAW_DECODER.raw_decode(text, start)[1]
+        return text[start:end]
+    except ValueError:
+        pass
+    
+    end = _JsonObjectScanner().feed(text)
+    if end != -1:
+        return text[start:end + 1]
+    
+    # Unbalanced (usually truncated) output - keep up to the last closing brace for repair
+    end = text.rfind('}')
+    return text[start:end + 1] if end > start else text[start:]
+
+def _extract_json(text):
+    """
+    Extract the JSON payload from a Gemini response
+    
+    Returns:
+        tuple: (json_str, source) where source is "markdown", "object" or "raw"
+    """
+    # Fence-free responses skip the regex and go straight to the linear object scan
+    if '```' in text:
+        json_match = _JSON_FENCE_RE.search(text)
+        if json_match:
+            return json_match.group(1), "markdown"
+    
+    json_object = _find_json_object(text)
+    if json_object is not None:
+        return json_object, "object"
+    
+    return text.strip(), "raw"
+
+def mark_topics_processed(topic_ids):
+    """
+    Mark trending topics as processed with a single UPDATE of the processed column
+    
+    Args:
+        topic_ids: Iterable of TrendingTopic primary keys
         
-        # Create a minimal valid structure
-        minimal_json = {
-            "title": title,
-            "meta_description": meta,
-            "introduction": "This is a placeholder introduction.",
-            "table_of_contents": ["Section 1"],
-            "sections": [
-                {
-                    "heading": "Section 1",
-                    "content": "This is placeholder content. The original content generation had errors."
-                }
-            ],
-            "conclusion": "This is a placeholder conclusion.",
-            "faq": [
-                {
-                    "question": "What happened to the original content?",
-                    "answer": "There was an error in generating the original content."
-                }
-            ]
-        }
-        return json.dumps(minimal_json)
+    Returns:
+        int: Number of topics updated
+    """
+    return TrendingTopic.objects.filter(pk__in=topic_ids).update(processed=True)
+
+@functools.lru_cache(maxsize=512)
+def _make_slug(title):
+    """Slug for a post title, capped at 200 characters ('' for titles without ASCII words)"""
+    return slugify(title)[:200]
+
+def _new_blog_post(topic, template_type, content_data, html_content, publish_now=False):
+    """
+    Build an unsaved BlogPost from the generated content and its HTML
+    
+    Returns:
+        BlogPost: The post, with a slug derived from its title
+    """
+    # Extract title and meta description from content data
+    # (empty values fall back to the defaults too)
+    title = content_data.get('title') or f"Blog about {topic.keyword}"
+    meta_description = content_data.get('meta_description') or f"Learn about {topic.keyword} in this comprehensive blog post."
     
-    return cleaned
+    return BlogPost(
+        title=title,
+        # Generate a slug from the title (titles without ASCII words get a random slug)
+        slug=_make_slug(title) or f"post-{uuid.uuid4().hex[:8]}",
+        content=html_content,
+        meta_description=meta_description,
+        template_type=template_type,
+        trending_topic=topic,
+        status='published' if publish_now else 'draft',
+        published_at=timezone.now() if publish_now else None,
+    )
 
-def is_valid_json(json_str):
-    """Check if a string is valid JSON"""
+def _insert_blog_post(blog_post, process_logger):
+    """INSERT a built BlogPost, adding a random suffix to its slug if the slug is taken"""
     try:
-        json.loads(json_str)
-        return True
-    except:
-        return False
+        with transaction.atomic():
+            blog_post.save(force_insert=True)
+    except IntegrityError:
+        # Slug already taken (e.g. the same title was generated before) - make it unique
+        blog_post.slug = f"{blog_post.slug}-{uuid.uuid4().hex[:6]}"
+        process_logger.info(f"Slug already exists, using: {blog_post.slug}")
+        blog_post.save(force_insert=True)
 
 def create_blog_post(topic, template_type, content_data, process_logger, publish_now=False):
     """
@@ -753,53 +1449,92 @@ def create_blog_post(topic, template_type, content_data, process_logger, publish
     try:
         process_logger.info(f"Creating blog post for topic: {topic.keyword}")
         
-        # Extract title and meta description from content data
-        title = content_data.get('title', f"Blog about {topic.keyword}")
-        meta_description = content_data.get('meta_description', f"Learn about {topic.keyword} in this comprehensive blog post.")
-        
         # Format the JSON content to HTML
         process_logger.info("Converting JSON content to HTML")
         html_content = format_json_to_html(content_data, template_type)
         
-        # Generate a slug from the title
-        slug = title.lower()
-        # Replace spaces with dashes and remove special characters
-        slug = re.sub(r'[^\w\s-]', '', slug)
-        slug = re.sub(r'[\s-]+', '-', slug)
-        
-        # Create the blog post
+        # Create the blog post; the topic is only marked processed if the insert succeeds
         process_logger.info("Creating blog post entry in database")
-        blog_post = BlogPost.objects.create(
-            title=title,
-            content=html_content,
-            meta_description=meta_description,
-            template_type=template_type,
-            trending_topic=topic,
-            status='published' if publish_now else 'draft',
-            published_at=timezone.now() if publish_now else None,
-            slug=slug
-        )
-        
-        # Log the creation with detailed information
-        process_logger.info(f"Successfully created blog post: {title}", {
-            "blog_id": str(blog_post.id),
-            "title": title,
-            "template_type": template_type,
-            "content_length": len(html_content),
-            "slug": slug
-        })
-        
-        # Log details about the content to help with debugging
-        sections_count = len(content_data.get('sections', []))
-        faq_count = len(content_data.get('faq', []))
-        process_logger.info(f"Content statistics: {sections_count} sections, {faq_count} FAQs")
-        
-        # Mark the trending topic as processed and used
+        blog_post = _new_blog_post(topic, template_type, content_data, html_content, publish_now)
+        with transaction.atomic():
+            _insert_blog_post(blog_post, process_logger)
+            mark_topics_processed([topic.pk])
         topic.processed = True
-        topic.save()
+        
+        # Log the creation with detailed information (only built when info logging is on)
+        if process_logger.isEnabledFor(logging.INFO):
+            process_logger.info(f"Successfully created blog post: {blog_post.title}", {
+                "blog_id": str(blog_post.id),
+                "title": blog_post.title,
+                "template_type": template_type,
+                "content_length": len(html_content),
+                "slug": blog_post.slug
+            })
+            
+            # Log details about the content to help with debugging
+            sections = content_data.get('sections') or ()
+            faq = content_data.get('faq') or ()
+            process_logger.info(f"Content statistics: {len(sections)} sections, {len(faq)} FAQs")
         
         return blog_post
         
     except Exception as e:
         process_logger.error(f"Error creating blog post: {e}")
-        return None 
\ No newline at end of file
+        return None
+
+def bulk_create_blog_posts(generated, process_logger, publish_now=False):
+    """
+    Create blog posts for several topics with one bulk INSERT and one topic UPDATE
+    
+    Slugs are made unique against each other and the stored posts up front; if one is
+    taken concurrently anyway, the posts are inserted one by one instead.
+    
+    Args:
+        generated: Iterable of (topic, template_type, content_data) tuples
+        process_logger: The process logger instance
+        publish_now: Boolean indicating whether to publish immediately
+        
+    Returns:
+        list: The created BlogPost objects
+    """
+    blog_posts = []
+    for topic, template_type, content_data in generated:
+        try:
+            html_content = format_json_to_html(content_data, template_type)
+            blog_posts.append(_new_blog_post(topic, template_type, content_data, html_content, publish_now))
+        except Exception as e:
+            process_logger.error(f"Error preparing blog post for topic {topic.keyword}: {e}")
+    
+    if not blog_posts:
+        return []
+    
+    taken_slugs = set(
+        BlogPost.objects.filter(slug__in=[blog_post.slug for blog_post in blog_posts])
+        .values_list('slug', flat=True)
+    )
+    for blog_post in blog_posts:
+        if blog_post.slug in taken_slugs:
+            blog_post.slug = f"{blog_post.slug}-{uuid.uuid4().hex[:6]}"
+        taken_slugs.add(blog_post.slug)
+    
+    try:
+        with transaction.atomic():
+            BlogPost.objects.bulk_create(blog_posts, batch_size=100)
+            mark_topics_processed([blog_post.trending_topic_id for blog_post in blog_posts])
+    except IntegrityError:
+        process_logger.warning("Slug conflict during bulk insert, creating blog posts one by one")
+        created = []
+        for blog_post in blog_posts:
+            try:
+                _insert_blog_post(blog_post, process_logger)
+                created.append(blog_post)
+            except Exception as e:
+                process_logger.error(f"Error creating blog post: {e}")
+        mark_topics_processed([blog_post.trending_topic_id for blog_post in created])
+        blog_posts = created
+    
+    if process_logger.isEnabledFor(logging.INFO):
+        process_logger.info(f"Created {len(blog_posts)} blog posts", {
+            "blog_ids": [str(blog_post.id) for blog_post in blog_posts]
+        })
+    return blog_posts
@@ -1,14 +1,47 @@
 import os
+import asyncio
+import codecs
 import json
+import hashlib
+import heapq
 import logging
+import mmap
 import time
 import re
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import uuid
+import atexit
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterator
 from pathlib import Path
 from dotenv import load_dotenv
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+# Prefer orjson for conversation and evaluation JSON; both variants produce UTF-8 bytes
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    
+    def _json_dumps(data: Any) -> bytes:
+        """Serialize data to JSON bytes with orjson."""
+        return orjson.dumps(data)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(data: Any) -> bytes:
+        """Serialize data to JSON bytes."""
+        return json.dumps(data).encode("utf-8")
+
+# Optional zstd compression of stored conversation histories
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Leading bytes of a zstd frame; rows written without compression start with '['
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
 
 # Configure logging
 logging.basicConfig(
@@ -26,18 +59,114 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in environment variables. Please add it to your .env file.")
 
-# Configure the Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+# The Gemini SDK (protobuf/gRPC) is imported and configured on first use, so importing
+# this module for the conversation cache or template selection does not load it
+_genai = None
+
+def _load_genai() -> Any:
+    """Import the Gemini SDK and configure the API key, once per process."""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+# Upload static prompt context (template library, content guidelines) once as server-side
+# cached content instead of resending it
+GEMINI_CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "False") == "True"
+GEMINI_CONTEXT_CACHE_TTL = timedelta(hours=1)
+
+# Cached contexts: sha256(model, system prompt, context) -> (CachedContent or None, expires_at)
+_CACHED_CONTEXTS: Dict[str, Any] = {}
+
+# Updated conversations are written to the database in batches by a background thread:
+# every _CONVERSATION_FLUSH_INTERVAL seconds, or sooner once this many are pending
+_CONVERSATION_FLUSH_INTERVAL = 0.5
+_CONVERSATION_FLUSH_BATCH_SIZE = 32
+# Timestamps of conversations that were only read are written every this many seconds
+_CONVERSATION_TOUCH_INTERVAL = 30
+# Expired and excess conversations are cleaned up after this many updates or seconds
+_CONVERSATION_CLEAN_EVERY_UPDATES = 64
+_CONVERSATION_CLEAN_INTERVAL = 60
+
+# templates.txt files at least this large are memory-mapped rather than read into a buffer
+_TEMPLATES_MMAP_MIN_SIZE = 16 * 1024
+
+# Byte order marks recognised in templates.txt, with the codec that decodes (and strips) them
+_TEXT_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Topic keywords used by get_preferred_template, by keyword group. All groups are matched
+# case-insensitively in a single scan of the topic; each match reports its group name.
+_TEMPLATE_KEYWORDS = {
+    "comparison": ("vs", "versus", "comparison", "compare", "better", "best"),
+    "news": ("news", "update", "latest", "trend", "announced", "release"),
+    "location": ("in", "near", "city", "region", "area", "local"),
+    "howto": ("how to", "steps", "guide", "tutorial", "diy", "process"),
+}
+# The "at_place" group is the case-sensitive "at City" pattern (the "in"/"near" forms are
+# already location keywords); the place name is a lookahead so it can still match a keyword
+_TEMPLATE_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(
+        f"(?P<{group}>{'|'.join(map(re.escape, keywords))})"
+        for group, keywords in _TEMPLATE_KEYWORDS.items()
+    ) + r"|(?P<at_place>(?-i:at(?=\s+[A-Z][a-z]))))\b",
+    re.IGNORECASE
+)
+# get_preferred_template results: the template_type reported for each template ID, and
+# the result used when no template information is available
+_PREFERRED_TEMPLATE_TYPES = {1: "how_to", 2: "news", 3: "review", 4: "opinion", 5: "how_to"}
+_DEFAULT_PREFERRED_TEMPLATE = {
+    "id": 5,
+    "template_key": "template5",
+    "name": "How-To Guide SEO Blog Template (Step-by-Step Evergreen)",
+    "template_type": "how_to"
+}
+
+# Conversation history roles sent to Gemini, mapped to Gemini's role names
+_GEMINI_ROLES = {"user": "user", "assistant": "model"}
 
 class ConversationCache:
     """Manages caching of conversation history for improved context awareness."""
     
+    # Process-wide instance shared by chatbots, and the process it was created in (see get_default)
+    _default_instance: Optional["ConversationCache"] = None
+    _default_pid: Optional[int] = None
+    _default_lock = threading.Lock()
+    
+    @classmethod
+    def get_default(cls, **kwargs) -> "ConversationCache":
+        """
+        Get the conversation cache shared by this process, creating it on first use.
+        
+        A new cache is created after a fork (prefork Celery/gunicorn workers): the parent's
+        database connection is not safe to share and its flusher thread does not exist
+        in the child.
+        
+        Args:
+            **kwargs: Arguments for the cache, used only when it is first created
+            
+        Returns:
+            The shared ConversationCache
+        """
+        pid = os.getpid()
+        if cls._default_instance is None or cls._default_pid != pid:
+            with cls._default_lock:
+                if cls._default_instance is None or cls._default_pid != pid:
+                    cls._default_instance = cls(**kwargs)
+                    cls._default_pid = pid
+        return cls._default_instance
+    
     def __init__(self, cache_dir: str = "cache", max_cache_size: int = 100, ttl: int = 86400):
         """
         Initialize the conversation cache.
         
         Args:
-            cache_dir: Directory to store conversation cache files
+            cache_dir: Directory holding the conversation database and template context
             max_cache_size: Maximum number of conversations to cache
             ttl: Time-to-live for cache entries in seconds (default: 24 hours)
         """
@@ -45,9 +174,36 @@ class ConversationCache:
         self.cache_dir.mkdir(exist_ok=True)
         self.max_cache_size = max_cache_size
         self.ttl = ttl
+        # Conversations read or written by this process; the database holds all of them
         self.cache: Dict[str, Dict[str, Any]] = {}
+        self._db_lock = threading.RLock()
+        self._db = self._connect()
+        # Reused for every row; both are only used while holding the database lock
+        self._zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        # IDs of conversations changed in memory but not yet written to the database
+        self._dirty: set = set()
+        # IDs of conversations read since the last touch flush; only their timestamp changed
+        self._touched: set = set()
+        self._last_touch_flush = time.time()
+        self._updates_since_clean = 0
+        self._last_clean = time.time()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
         self.template_info = self._load_template_information()
+        # template_info does not change after loading, so the context message is built once
+        self._template_context = self._format_template_context()
+        self._template_context_hash = hashlib.blake2b(
+            self._template_context.encode("utf-8"), digest_size=8
+        ).hexdigest()
+        # Template context bodies by hash, for restoring the messages stored by reference
+        self._template_contexts = {self._template_context_hash: self._template_context}
+        self._store_template_context()
+        self._preferred_template_responses = self._build_preferred_template_responses()
         self._load_cache()
+        
+        threading.Thread(target=self._flusher, name="conversation-cache-flusher", daemon=True).start()
+        atexit.register(self._final_flush)
     
     def _load_template_information(self) -> Dict[str, Any]:
         """Load template information from the template_context.json file and templates.txt."""
@@ -65,18 +221,10 @@ class ConversationCache:
             templates_txt_path = Path("blog/templates.txt")
             raw_templates_content = ""
             if templates_txt_path.exists():
-                # Try different encodings to handle potential issues
-                encodings_to_try = ['utf-8', 'latin-1', 'utf-16', 'cp1252']
-                for encoding in encodings_to_try:
-                    try:
-                        with open(templates_txt_path, 'r', encoding=encoding) as f:
-                            raw_templates_content = f.read()
-                        logger.info(f"Loaded templates.txt content using {encoding} encoding ({len(raw_templates_content)} bytes)")
-                        break
-                    except UnicodeDecodeError as e:
-                        logger.warning(f"Failed to read templates.txt with {encoding} encoding: {e}")
-                    except Exception as e:
-                        logger.error(f"Error reading templates.txt with {encoding} encoding: {e}")
+                try:
+                    raw_templates_content = self._read_templates_file(templates_txt_path)
+                except OSError as e:
+                    logger.error(f"Error reading templates.txt: {e}")
                         
                 if not raw_templates_content:
                     logger.error("Failed to read templates.txt with all attempted encodings")
@@ -90,25 +238,91 @@ class ConversationCache:
             logger.error(f"Error loading template information: {e}")
             return {"templates": [], "raw_templates": ""}
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the conversation database and create its schema."""
+        db = sqlite3.connect(
+            str(self.cache_dir / "conversations.db"),
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # The page size only takes effect while the database file is still empty,
+        # so it has to come before the WAL switch and the schema
+        db.execute("PRAGMA page_size=8192")
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA cache_size=-20000")
+        db.execute("PRAGMA temp_store=MEMORY")
+        db.execute("PRAGMA mmap_size=268435456")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS conv ("
+            "conversation_id TEXT PRIMARY KEY, timestamp REAL NOT NULL, history BLOB NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON conv(timestamp)")
+        # Template context messages are stored once here and referenced by hash from histories
+        db.execute("CREATE TABLE IF NOT EXISTS template_context (hash TEXT PRIMARY KEY, body TEXT NOT NULL)")
+        return db
+    
+    @staticmethod
+    def _read_templates_file(path: Path) -> str:
+        """
+        Read and decode templates.txt, reading the file only once.
+        
+        Large files are memory-mapped so the decoders read straight from the page cache.
+        
+        Args:
+            path: Path of the templates file
+            
+        Returns:
+            The decoded content, or an empty string if no encoding could decode it
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= _TEMPLATES_MMAP_MIN_SIZE:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+                
+        try:
+            # A byte order mark names the encoding; otherwise try UTF-8, then latin-1,
+            # which decodes any byte sequence
+            encodings_to_try = next(
+                ([encoding] for bom, encoding in _TEXT_BOMS if data[:len(bom)] == bom),
+                ['utf-8', 'latin-1']
+            )
+            for encoding in encodings_to_try:
+                try:
+                    content = str(data, encoding)
+                    logger.info(f"Loaded templates.txt content using {encoding} encoding ({len(content)} bytes)")
+                    return content
+                except UnicodeDecodeError as e:
+                    logger.warning(f"Failed to read templates.txt with {encoding} encoding: {e}")
+            return ""
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    
     def _load_cache(self) -> None:
-        """Load existing cache from disk."""
+        """Import conversations left as JSON files by older versions into the database."""
         try:
+            imported = 0
             for file_path in self.cache_dir.glob("*.json"):
                 # Skip the template context file
                 if file_path.name == "template_context.json":
                     continue
                     
                 try:
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                        if self._is_valid_cache_entry(data):
-                            self.cache[data["conversation_id"]] = data
+                    with open(file_path, 'rb') as f:
+                        data = _json_loads(f.read())
+                    if self._is_valid_cache_entry(data):
+                        self._write_conversation(data["conversation_id"], data["timestamp"], data["history"])
+                        imported += 1
+                    file_path.unlink()
                 except Exception as e:
-                    logger.error(f"Error loading cache file {file_path}: {e}")
+                    logger.error(f"Error importing cache file {file_path}: {e}")
             
             # Clean up expired or excess cache entries
             self._clean_cache()
-            logger.info(f"Loaded {len(self.cache)} conversation contexts from cache")
+            if imported:
+                logger.info(f"Imported {imported} conversation contexts into {self.cache_dir / 'conversations.db'}")
         except Exception as e:
             logger.error(f"Error initializing cache: {e}")
     
@@ -125,46 +339,138 @@ class ConversationCache:
     
     def _clean_cache(self) -> None:
         """Remove expired entries and limit cache size."""
-        current_time = time.time()
+        # Write pending updates and timestamps first: the flusher skips conversations that
+        # are no longer in memory, so evicting an unwritten one would drop its update
+        self._flush(touched=True)
         
-        # Remove expired entries
+        self._updates_since_clean = 0
+        self._last_clean = time.time()
+        cutoff = self._last_clean - self.ttl
+        try:
+            with self._flush_lock, self._db_lock:
+                self._db.execute("DELETE FROM conv WHERE timestamp < ?", (cutoff,))
+                excess = self._db.execute("SELECT COUNT(*) FROM conv").fetchone()[0] - self.max_cache_size
+                if excess > 0:
+                    # Oldest first, read from the timestamp index
+                    self._db.execute(
+                        "DELETE FROM conv WHERE conversation_id IN "
+                        "(SELECT conversation_id FROM conv ORDER BY timestamp ASC LIMIT ?)",
+                        (excess,)
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Error cleaning conversation cache: {e}")
+        
+        # Apply the same limits to the conversations held in memory
         expired_ids = [
             conv_id for conv_id, data in self.cache.items()
-            if (current_time - data.get("timestamp", 0)) > self.ttl
+            if data.get("timestamp", 0) < cutoff
         ]
         for conv_id in expired_ids:
-            self._remove_from_cache(conv_id)
+            del self.cache[conv_id]
         
-        # Limit cache size if needed
         if len(self.cache) > self.max_cache_size:
-            # Sort by timestamp (oldest first)
-            sorted_entries = sorted(
+            # Remove the oldest entries to maintain max size
+            oldest_entries = heapq.nsmallest(
+                len(self.cache) - self.max_cache_size,
                 self.cache.items(),
                 key=lambda item: item[1].get("timestamp", 0)
             )
-            # Remove oldest entries to maintain max size
-            for conv_id, _ in sorted_entries[:len(self.cache) - self.max_cache_size]:
-                self._remove_from_cache(conv_id)
+            for conv_id, _ in oldest_entries:
+                del self.cache[conv_id]
     
     def _remove_from_cache(self, conversation_id: str) -> None:
-        """Remove a conversation from cache and delete its file."""
-        if conversation_id in self.cache:
-            del self.cache[conversation_id]
+        """Remove a conversation from cache and delete it from the database."""
+        self.cache.pop(conversation_id, None)
+        self._dirty.discard(conversation_id)
+        self._touched.discard(conversation_id)
+        try:
+            with self._flush_lock, self._db_lock:
+                self._db.execute("DELETE FROM conv WHERE conversation_id = ?", (conversation_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Error removing conversation from cache: {e}")
+    
+    def _read_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation from the database, or None if it is missing or expired."""
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT timestamp, history FROM conv WHERE conversation_id = ?",
+                    (conversation_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                history = self._decode_history(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Error reading conversation from cache: {e}")
+            return None
             
-            # Remove the cache file
-            cache_file = self.cache_dir / f"{conversation_id}.json"
-            if cache_file.exists():
-                cache_file.unlink()
+        data = {"conversation_id": conversation_id, "timestamp": row[0], "history": history}
+        return data if self._is_valid_cache_entry(data) else None
+    
+    def _store_template_context(self) -> None:
+        """Save the current template context body so stored histories can reference it."""
+        if not self._template_context:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO template_context (hash, body) VALUES (?, ?)",
+                    (self._template_context_hash, self._template_context)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error saving template context to cache: {e}")
+    
+    def _get_template_context_body(self, context_hash: str) -> str:
+        """Get a stored template context body by hash. Called while holding the database lock."""
+        body = self._template_contexts.get(context_hash)
+        if body is None:
+            row = self._db.execute(
+                "SELECT body FROM template_context WHERE hash = ?", (context_hash,)
+            ).fetchone()
+            body = row[0] if row else ""
+            self._template_contexts[context_hash] = body
+        return body
+    
+    def _encode_history(self, history: List[Dict[str, str]]) -> bytes:
+        """Serialize a conversation history for storage, compressed when zstd is available."""
+        # Template context messages are stored without their content, which is kept by hash
+        history = [
+            {key: value for key, value in message.items() if key != "content"}
+            if message.get("template_context_hash") in self._template_contexts else message
+            for message in history
+        ]
+        payload = _json_dumps(history)
+        if self._zstd_compressor is not None:
+            payload = self._zstd_compressor.compress(payload)
+        return payload
+    
+    def _decode_history(self, blob: Any) -> List[Dict[str, str]]:
+        """Deserialize a stored conversation history, compressed or not."""
+        if isinstance(blob, bytes) and blob[:4] == _ZSTD_MAGIC:
+            if self._zstd_decompressor is None:
+                raise ValueError("conversation is zstd-compressed but zstandard is not installed")
+            blob = self._zstd_decompressor.decompress(blob)
+        history = _json_loads(blob)
+        for message in history:
+            context_hash = message.get("template_context_hash")
+            if context_hash and "content" not in message:
+                message["content"] = self._get_template_context_body(context_hash)
+        return history
     
     def get_conversation(self, conversation_id: str) -> List[Dict[str, str]]:
         """Get conversation history for a given ID."""
-        if conversation_id in self.cache:
-            data = self.cache[conversation_id]
-            # Update timestamp to prevent expiration of active conversations
-            data["timestamp"] = time.time()
-            self._save_conversation(conversation_id, data["history"])
-            return data["history"]
-        return []
+        data = self.cache.get(conversation_id)
+        if data is None:
+            data = self._read_conversation(conversation_id)
+            if data is None:
+                return []
+            self.cache[conversation_id] = data
+            
+        # Update timestamp to prevent expiration of active conversations; the history is
+        # unchanged, so only the timestamp is written, with the next touch flush
+        data["timestamp"] = time.time()
+        self._touched.add(conversation_id)
+        return data["history"]
     
     def update_conversation(self, conversation_id: str, history: List[Dict[str, str]]) -> None:
         """Update or create a conversation in the cache."""
@@ -174,19 +480,98 @@ class ConversationCache:
             "history": history
         }
         self._save_conversation(conversation_id, history)
-        self._clean_cache()
+        
+        # The size limit changes by at most one per update, so cleaning is amortized
+        self._updates_since_clean += 1
+        if (self._updates_since_clean >= _CONVERSATION_CLEAN_EVERY_UPDATES
+                or time.time() - self._last_clean >= _CONVERSATION_CLEAN_INTERVAL):
+            self._clean_cache()
     
     def _save_conversation(self, conversation_id: str, history: List[Dict[str, str]]) -> None:
-        """Save conversation to disk."""
+        """Queue a conversation to be written to disk by the flusher thread."""
+        self._dirty.add(conversation_id)
+        if len(self._dirty) >= _CONVERSATION_FLUSH_BATCH_SIZE:
+            self._flush_requested.set()
+    
+    def _flusher(self) -> None:
+        """Background loop writing pending conversations to the database."""
+        while True:
+            self._flush_requested.wait(_CONVERSATION_FLUSH_INTERVAL)
+            self._flush_requested.clear()
+            self._flush(touched=time.time() - self._last_touch_flush >= _CONVERSATION_TOUCH_INTERVAL)
+    
+    def _final_flush(self) -> None:
+        """Write any pending conversations before the interpreter exits."""
+        self._flush(touched=True)
         try:
-            cache_file = self.cache_dir / f"{conversation_id}.json"
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    "conversation_id": conversation_id,
-                    "timestamp": time.time(),
-                    "history": history
-                }, f)
-        except Exception as e:
+            with self._db_lock:
+                self._db.close()
+        except sqlite3.Error as e:
+            logger.error(f"Error closing conversation cache: {e}")
+    
+    def _flush(self, touched: bool = False) -> None:
+        """
+        Write all pending conversations to the database in one transaction.
+        
+        Args:
+            touched: Also write the timestamps of conversations that were only read
+        """
+        with self._flush_lock:
+            touch_rows = []
+            if touched:
+                self._last_touch_flush = time.time()
+                touched_ids = list(self._touched)
+                self._touched.difference_update(touched_ids)
+                for conv_id in touched_ids:
+                    data = self.cache.get(conv_id)
+                    if data is not None and conv_id not in self._dirty:
+                        touch_rows.append((data["timestamp"], conv_id))
+                        
+            if not self._dirty and not touch_rows:
+                return
+                
+            pending = list(self._dirty)
+            self._dirty.difference_update(pending)
+            rows = []
+            with self._db_lock:
+                for conv_id in pending:
+                    data = self.cache.get(conv_id)
+                    if data is None:
+                        # Evicted or cleared before it was written
+                        continue
+                    try:
+                        rows.append((conv_id, data["timestamp"], self._encode_history(data["history"])))
+                    except (TypeError, ValueError) as e:
+                        logger.error(f"Error serializing conversation {conv_id}: {e}")
+                    
+            try:
+                with self._db_lock:
+                    self._db.execute("BEGIN")
+                    try:
+                        self._db.executemany(
+                            "INSERT OR REPLACE INTO conv (conversation_id, timestamp, history) VALUES (?, ?, ?)",
+                            rows
+                        )
+                        self._db.executemany("UPDATE conv SET timestamp = ? WHERE conversation_id = ?", touch_rows)
+                        self._db.execute("COMMIT")
+                    except BaseException:
+                        self._db.execute("ROLLBACK")
+                        raise
+            except sqlite3.Error as e:
+                logger.error(f"Error saving conversations to cache: {e}")
+                # Try again on the next flush
+                self._dirty.update(row[0] for row in rows)
+                self._touched.update(row[1] for row in touch_rows)
+    
+    def _write_conversation(self, conversation_id: str, timestamp: float, history: List[Dict[str, str]]) -> None:
+        """Insert or replace a conversation row."""
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO conv (conversation_id, timestamp, history) VALUES (?, ?, ?)",
+                    (conversation_id, timestamp, self._encode_history(history))
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
             logger.error(f"Error saving conversation to cache: {e}")
     
     def clear_conversation(self, conversation_id: str) -> None:
@@ -195,14 +580,23 @@ class ConversationCache:
     
     def clear_all(self) -> None:
         """Clear all conversations from cache."""
-        for conv_id in list(self.cache.keys()):
-            self._remove_from_cache(conv_id)
+        self.cache.clear()
+        self._dirty.clear()
+        self._touched.clear()
+        try:
+            with self._flush_lock, self._db_lock:
+                self._db.execute("DELETE FROM conv")
+        except sqlite3.Error as e:
+            logger.error(f"Error clearing conversation cache: {e}")
     
-    def add_template_context_to_conversation(self, conversation_id: str) -> None:
-        """Add template information to a conversation as context."""
+    def build_template_context(self) -> str:
+        """Get the template information formatted as the context message sent to Gemini."""
+        return self._template_context
+    
+    def _format_template_context(self) -> str:
+        """Format the template information into the context message sent to Gemini."""
         if not self.template_info or "templates" not in self.template_info:
-            logger.warning("No template information available to add to conversation")
-            return
+            return ""
             
         # Format template information into a clear message
         template_details = []
@@ -235,19 +629,31 @@ class ConversationCache:
             template_selection_guidance +
             "\n\nIMPORTANT: When selecting a template, use the structured template information above in conjunction with the detailed template descriptions to decide which template (by template ID and name) would be most appropriate for the given topic."
         )
+        return template_context
+    
+    def add_template_context_to_conversation(self, conversation_id: str) -> None:
+        """Add template information to a conversation as context."""
+        template_context = self.build_template_context()
+        if not template_context:
+            logger.warning("No template information available to add to conversation")
+            return
         
         # Get existing conversation
         history = self.get_conversation(conversation_id)
         
         # Check if template context is already in the conversation
         template_already_added = any(
-            message.get("role") == "system" and "TEMPLATE INFORMATION" in message.get("content", "")
+            message.get("template_context_hash") == self._template_context_hash
             for message in history
         )
         
         if not template_already_added:
-            # Add template context as a system message
-            system_message = {"role": "system", "content": template_context}
+            # Add template context as a system message, tagged with its hash
+            system_message = {
+                "role": "system",
+                "content": template_context,
+                "template_context_hash": self._template_context_hash,
+            }
             
             # If there's an existing system message, add it after that
             system_index = next((i for i, msg in enumerate(history) 
@@ -270,17 +676,12 @@ class ConversationCache:
             topic_keyword: The topic keyword to analyze
             
         Returns:
-            Dict containing the preferred template information
+            Dict containing the preferred template information. The dicts are shared
+            between calls and must not be modified.
         """
+        # Default template if we can't determine a better one
+        default_template = _DEFAULT_PREFERRED_TEMPLATE
         try:
-            # Default template if we can't determine a better one
-            default_template = {
-                "id": 5,
-                "template_key": "template5",
-                "name": "How-To Guide SEO Blog Template (Step-by-Step Evergreen)",
-                "template_type": "how_to"
-            }
-            
             # If we don't have template information, return the default
             if not self.template_info or "templates" not in self.template_info:
                 logger.warning("No template information available to determine preferred template")
@@ -300,69 +701,40 @@ class ConversationCache:
             # Simple keyword-based matching as a fallback
             # This is a basic implementation - in production, you might want to use
             # more sophisticated NLP techniques or AI to determine the best template
+            matched_groups = {match.lastgroup for match in _TEMPLATE_KEYWORD_RE.finditer(topic_keyword)}
             
             # Check if the topic contains comparison keywords
-            comparison_keywords = ["vs", "versus", "comparison", "compare", "better", "best"]
-            if any(keyword in topic_keyword.lower() for keyword in comparison_keywords):
+            if "comparison" in matched_groups:
                 # Match to Comparison Blog Structure (template3)
-                for template in templates:
-                    if template.get("id") == 3:
-                        return {
-                            "id": template.get("id"),
-                            "template_key": template.get("template_key"),
-                            "name": template.get("name"),
-                            "template_type": "review"
-                        }
+                response = self._preferred_template_responses.get(3)
+                if response:
+                    return response
             
             # Check if topic contains news/trending keywords
-            news_keywords = ["news", "update", "latest", "trend", "announced", "release"]
-            if any(keyword in topic_keyword.lower() for keyword in news_keywords):
+            if "news" in matched_groups:
                 # Match to Trend-Based SEO Blog Structure (template2)
-                for template in templates:
-                    if template.get("id") == 2:
-                        return {
-                            "id": template.get("id"),
-                            "template_key": template.get("template_key"),
-                            "name": template.get("name"),
-                            "template_type": "news"
-                        }
+                response = self._preferred_template_responses.get(2)
+                if response:
+                    return response
             
             # Check if topic contains location-based keywords
-            location_keywords = ["in", "near", "city", "region", "area", "local"]
-            location_pattern = r'\b(in|near|at)\s+[A-Z][a-z]+'  # Simple regex for "in City" pattern
-            if any(keyword in topic_keyword.lower() for keyword in location_keywords) or re.search(location_pattern, topic_keyword):
+            if "location" in matched_groups or "at_place" in matched_groups:
                 # Match to Local SEO Blog Template (template4)
-                for template in templates:
-                    if template.get("id") == 4:
-                        return {
-                            "id": template.get("id"),
-                            "template_key": template.get("template_key"),
-                            "name": template.get("name"),
-                            "template_type": "opinion"
-                        }
+                response = self._preferred_template_responses.get(4)
+                if response:
+                    return response
             
             # Check if topic contains how-to keywords
-            howto_keywords = ["how to", "steps", "guide", "tutorial", "diy", "process"]
-            if any(keyword in topic_keyword.lower() for keyword in howto_keywords):
+            if "howto" in matched_groups:
                 # Match to How-To Guide SEO Blog Template (template5)
-                for template in templates:
-                    if template.get("id") == 5:
-                        return {
-                            "id": template.get("id"),
-                            "template_key": template.get("template_key"),
-                            "name": template.get("name"),
-                            "template_type": "how_to"
-                        }
+                response = self._preferred_template_responses.get(5)
+                if response:
+                    return response
             
             # Default to Evergreen Pillar Page Structure for broad topics
-            for template in templates:
-                if template.get("id") == 1:
-                    return {
-                        "id": template.get("id"),
-                        "template_key": template.get("template_key"),
-                        "name": template.get("name"),
-                        "template_type": "how_to"
-                    }
+            response = self._preferred_template_responses.get(1)
+            if response:
+                return response
             
             # If no specific template was found, return default
             return default_template
@@ -370,6 +742,23 @@ class ConversationCache:
         except Exception as e:
             logger.error(f"Error determining preferred template: {e}")
             return default_template
+    
+    def _build_preferred_template_responses(self) -> Dict[Any, Dict[str, Any]]:
+        """Build the get_preferred_template result for each template it can return, by ID."""
+        responses = {}
+        for template in self.template_info.get("templates", []):
+            if not isinstance(template, dict):
+                continue
+            template_id = template.get("id")
+            # The first template listed with an ID wins, as in a linear search
+            if template_id in _PREFERRED_TEMPLATE_TYPES and template_id not in responses:
+                responses[template_id] = {
+                    "id": template_id,
+                    "template_key": template.get("template_key"),
+                    "name": template.get("name"),
+                    "template_type": _PREFERRED_TEMPLATE_TYPES[template_id]
+                }
+        return responses
 
 class GeminiChatbot:
     """Advanced chatbot using Google's Gemini API with context caching."""
@@ -381,7 +770,8 @@ class GeminiChatbot:
         max_output_tokens: int = 2048,
         top_p: float = 0.95,
         top_k: int = 40,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        cache: Optional[ConversationCache] = None
     ):
         """
         Initialize the Gemini chatbot.
@@ -393,6 +783,7 @@ class GeminiChatbot:
             top_p: Nucleus sampling probability threshold
             top_k: Number of highest probability tokens to consider
             system_prompt: Optional system prompt to define chatbot behavior
+            cache: Optional conversation cache (default: the process-wide shared cache)
         """
         self.model_name = model_name
         self.temperature = temperature
@@ -400,25 +791,33 @@ class GeminiChatbot:
         self.top_p = top_p
         self.top_k = top_k
         
+        self.generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_output_tokens,
+            "top_p": top_p,
+            "top_k": top_k,
+        }
+        genai = _load_genai()
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+        self.safety_settings = {
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+        }
+        
         # Initialize the model
         self.model = genai.GenerativeModel(
             model_name=model_name,
-            generation_config={
-                "temperature": temperature,
-                "max_output_tokens": max_output_tokens,
-                "top_p": top_p,
-                "top_k": top_k,
-            },
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            },
+            generation_config=self.generation_config,
+            safety_settings=self.safety_settings,
         )
         
-        # Create conversation cache
-        self.cache = ConversationCache()
+        # Models bound to per-call system prompt overrides, created once per prompt
+        self._system_prompt_models: Dict[str, Any] = {}
+        
+        # Conversation cache, shared by all chatbots in the process unless one is given
+        self._cache = cache
         
         # Set system prompt
         self.system_prompt = system_prompt or (
@@ -428,7 +827,7 @@ class GeminiChatbot:
             "be honest about it rather than making up information."
         )
     
-    def chat(self, user_input: str, conversation_id: str = None, context: Optional[List[Dict[str, str]]] = None, include_template_info: bool = False) -> Dict[str, Any]:
+    def chat(self, user_input: str, conversation_id: str = None, context: Optional[List[Dict[str, str]]] = None, include_template_info: bool = False, cached_context: Optional[str] = None, system_prompt_override: Optional[str] = None, stateless: bool = False) -> Dict[str, Any]:
         """
         Process a user input and generate a response.
         
@@ -437,89 +836,295 @@ class GeminiChatbot:
             conversation_id: Unique identifier for the conversation
             context: Optional context to override cached conversation history
             include_template_info: Whether to include template information in the context
+            cached_context: Optional static preamble served from Gemini cached content
+                (sent inline before the message when context caching is unavailable)
+            system_prompt_override: Optional system instruction used for this call instead
+                of the chatbot's system prompt
+            stateless: One-shot call - conversation history is neither read nor stored
             
         Returns:
             Dict containing response text and metadata
         """
         start_time = time.time()
+        try:
+            conversation_id, history, model, user_input = self._prepare_chat(
+                user_input, conversation_id, context, include_template_info,
+                cached_context, system_prompt_override, stateless
+            )
+            
+            # Create chat session
+            chat = self._start_chat(model, history, conversation_id, user_input, system_prompt_override)
+            
+            # Generate response
+            response = chat.send_message(user_input)
+            return self._finish_chat(conversation_id, history, response.text, start_time, stateless)
+            
+        except Exception as e:
+            return self._chat_error(conversation_id, e)
+    
+    async def chat_async(self, user_input: str, conversation_id: str = None, context: Optional[List[Dict[str, str]]] = None, include_template_info: bool = False, cached_context: Optional[str] = None, system_prompt_override: Optional[str] = None, stateless: bool = False) -> Dict[str, Any]:
+        """
+        Process a user input and generate a response without blocking the event loop.
+        
+        Takes the same arguments and returns the same result as chat(); the Gemini
+        request is made with the SDK's async client.
+        """
+        start_time = time.time()
+        try:
+            conversation_id, history, model, user_input = self._prepare_chat(
+                user_input, conversation_id, context, include_template_info,
+                cached_context, system_prompt_override, stateless
+            )
+            chat = self._start_chat(model, history, conversation_id, user_input, system_prompt_override)
+            response = await chat.send_message_async(user_input)
+            return self._finish_chat(conversation_id, history, response.text, start_time, stateless)
+            
+        except Exception as e:
+            return self._chat_error(conversation_id, e)
+    
+    def _prepare_chat(self, user_input: str, conversation_id: Optional[str], context: Optional[List[Dict[str, str]]], include_template_info: bool, cached_context: Optional[str], system_prompt_override: Optional[str], stateless: bool):
+        """
+        Resolve the conversation, history, model and message for a chat call.
         
+        Returns:
+            Tuple of (conversation_id, history, model, user_input)
+        """
         # Generate conversation ID if not provided
         if not conversation_id:
-            conversation_id = f"conv_{int(time.time())}_{hash(user_input) % 10000}"
+            conversation_id = f"conv_{uuid.uuid4().hex}"
+        
+        # Get conversation history from cache or use provided context (none for one-shot calls)
+        history = [] if stateless else (context or self.cache.get_conversation(conversation_id))
         
-        # Get conversation history from cache or use provided context
-        history = context or self.cache.get_conversation(conversation_id)
+        model, user_input = self._model_for_context(cached_context, user_input, system_prompt_override)
         
         # Add template information to the conversation if requested
         if include_template_info:
-            self.cache.add_template_context_to_conversation(conversation_id)
-            # Refresh history to include the template information
-            history = self.cache.get_conversation(conversation_id)
+            cached_model = self._get_template_context_model(system_prompt_override)
+            if cached_model:
+                # The template library lives in the server-side cached content
+                model = cached_model
+            elif stateless:
+                # No stored conversation to add it to - send it with the message
+                template_context = self.cache.build_template_context()
+                if template_context:
+                    user_input = f"{template_context}\n\n{user_input}"
+            else:
+                self.cache.add_template_context_to_conversation(conversation_id)
+                # Refresh history to include the template information
+                history = self.cache.get_conversation(conversation_id)
+                
+        return conversation_id, history, model, user_input
+    
+    def _start_chat(self, model: Any, history: List[Dict[str, str]], conversation_id: str, user_input: str, system_prompt_override: Optional[str] = None) -> Any:
+        """Start a Gemini chat session and add the outgoing message to the history."""
+        chat = model.start_chat(history=self._format_history_for_gemini(history))
         
-        try:
-            # Create chat session
-            chat = self.model.start_chat(history=self._format_history_for_gemini(history))
+        # Add system prompt if this is a new conversation
+        if not history:
+            logger.info(f"Starting new conversation: {conversation_id}")
+            # The system prompt is set through the first message in this implementation
+            history.append({"role": "system", "content": system_prompt_override or self.system_prompt})
+        
+        # Add user input to history
+        history.append({"role": "user", "content": user_input})
+        return chat
+    
+    def _finish_chat(self, conversation_id: str, history: List[Dict[str, str]], response_text: str, start_time: float, stateless: bool) -> Dict[str, Any]:
+        """Record the model's response in the history and build the chat result."""
+        # Add model's response to history
+        history.append({"role": "assistant", "content": response_text})
+        
+        # Update cache with new conversation history
+        if not stateless:
+            self.cache.update_conversation(conversation_id, history)
+        
+        return {
+            "response": response_text,
+            "conversation_id": conversation_id,
+            "model": self.model_name,
+            "processing_time": time.time() - start_time,
+            "timestamp": datetime.now().isoformat(),
+        }
+    
+    def _chat_error(self, conversation_id: str, error: Exception) -> Dict[str, Any]:
+        """Build the chat result returned when a request fails."""
+        logger.error(f"Error in chat processing: {error}")
+        return {
+            "response": "I'm sorry, I encountered an error processing your request.",
+            "conversation_id": conversation_id,
+            "error": str(error),
+            "timestamp": datetime.now().isoformat(),
+        }
+    
+    def chat_stream(self, user_input: str, conversation_id: str = None, context: Optional[List[Dict[str, str]]] = None, cached_context: Optional[str] = None, system_prompt_override: Optional[str] = None, stateless: bool = False) -> Iterator[str]:
+        """
+        Process a user input and stream the response text as it is generated.
+        
+        Args:
+            user_input: User's message
+            conversation_id: Unique identifier for the conversation
+            context: Optional context to override cached conversation history
+            cached_context: Optional static preamble served from Gemini cached content
+            system_prompt_override: Optional system instruction used for this call instead
+                of the chatbot's system prompt
+            stateless: One-shot call - conversation history is neither read nor stored
             
-            # Add system prompt if this is a new conversation
-            if not history:
-                logger.info(f"Starting new conversation: {conversation_id}")
-                # The system prompt is set through the first message in this implementation
-                system_message = {"role": "system", "content": self.system_prompt}
-                history.append(system_message)
+        Yields:
+            Response text chunks. The conversation history is updated once the stream
+            is exhausted or closed, and the time to the first chunk is logged. API errors
+            are raised to the caller.
+        """
+        conversation_id, history, model, user_input = self._prepare_chat(
+            user_input, conversation_id, context, False,
+            cached_context, system_prompt_override, stateless
+        )
+        chat = self._start_chat(model, history, conversation_id, user_input, system_prompt_override)
+        
+        start_time = time.perf_counter()
+        first_token_ms = None
+        response = chat.send_message(user_input, stream=True)
+        chunks = []
+        try:
+            for chunk in response:
+                text = chunk.text
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start_time) * 1000
+                chunks.append(text)
+                yield text
+        finally:
+            if first_token_ms is not None:
+                logger.info(
+                    "Streamed response for %s: first token after %.0f ms, %.0f ms total",
+                    conversation_id, first_token_ms, (time.perf_counter() - start_time) * 1000
+                )
+            if chunks and not stateless:
+                # Add model's (possibly partial) response to history
+                history.append({"role": "assistant", "content": "".join(chunks)})
+                self.cache.update_conversation(conversation_id, history)
+    
+    @property
+    def cache(self) -> ConversationCache:
+        """
+        The conversation cache for this chatbot.
+        
+        The shared cache is looked up on each use, so a chatbot created at import time
+        (before a worker fork) uses the cache of the process it runs in.
+        """
+        return self._cache or ConversationCache.get_default()
+    
+    def _get_model(self, system_prompt: Optional[str] = None) -> Any:
+        """
+        Get the model for a call: the default model, or one bound to a system prompt override.
+        
+        Override models are created once per prompt and reuse the same configured client.
+        """
+        if not system_prompt:
+            return self.model
             
-            # Add user input to history
-            user_message = {"role": "user", "content": user_input}
-            history.append(user_message)
+        model = self._system_prompt_models.get(system_prompt)
+        if model is None:
+            model = _load_genai().GenerativeModel(
+                model_name=self.model_name,
+                generation_config=self.generation_config,
+                safety_settings=self.safety_settings,
+                system_instruction=system_prompt,
+            )
+            self._system_prompt_models[system_prompt] = model
+        return model
+    
+    def _model_for_context(self, cached_context: Optional[str], user_input: str, system_prompt: Optional[str] = None):
+        """
+        Get the model and message to send for an optional static preamble.
+        
+        Returns (model, user_input): a model bound to the cached preamble with the message
+        unchanged, or the regular model with the preamble prepended to the message.
+        """
+        if not cached_context:
+            return self._get_model(system_prompt), user_input
             
-            # Generate response
-            response = chat.send_message(user_input)
-            response_text = response.text
+        cached_model = self._get_cached_context_model(cached_context, system_prompt)
+        if cached_model:
+            return cached_model, user_input
             
-            # Add model's response to history
-            model_message = {"role": "assistant", "content": response_text}
-            history.append(model_message)
+        return self._get_model(system_prompt), f"{cached_context}\n\n{user_input}"
+    
+    def _get_template_context_model(self, system_prompt: Optional[str] = None) -> Optional[Any]:
+        """
+        Get a model bound to the template library uploaded as Gemini cached content.
+        
+        Returns None when context caching is disabled or unavailable, in which case the
+        template context is added inline to the conversation.
+        """
+        template_context = self.cache.build_template_context()
+        if not template_context:
+            return None
             
-            # Update cache with new conversation history
-            self.cache.update_conversation(conversation_id, history)
+        return self._get_cached_context_model(template_context, system_prompt)
+    
+    def _get_cached_context_model(self, context: str, system_prompt: Optional[str] = None) -> Optional[Any]:
+        """
+        Get a model bound to a static context uploaded as Gemini cached content.
+        
+        The cached content is created once per (model, system prompt, context) hash and
+        recreated when it expires. Returns None when context caching is disabled or
+        unavailable for this context.
+        """
+        if not GEMINI_CONTEXT_CACHE_ENABLED:
+            return None
             
-            # Calculate processing time
-            processing_time = time.time() - start_time
+        system_prompt = system_prompt or self.system_prompt
+        context_hash = hashlib.sha256(
+            f"{self.model_name}\n{system_prompt}\n{context}".encode("utf-8")
+        ).hexdigest()
+        
+        cached_content, expires_at = _CACHED_CONTEXTS.get(context_hash, (None, 0))
+        if time.time() >= expires_at:
+            try:
+                from google.api_core.exceptions import InvalidArgument, PermissionDenied
+                from google.generativeai import caching
+            except ImportError as e:
+                logger.warning(f"Gemini context caching not supported by the installed SDK: {e}")
+                _CACHED_CONTEXTS[context_hash] = (None, float("inf"))
+                return None
+                
+            try:
+                cached_content = caching.CachedContent.create(
+                    model=f"models/{self.model_name}",
+                    system_instruction=system_prompt,
+                    contents=[context],
+                    ttl=GEMINI_CONTEXT_CACHE_TTL,
+                )
+                # Refresh slightly before the server-side TTL runs out
+                expires_at = time.time() + GEMINI_CONTEXT_CACHE_TTL.total_seconds() - 60
+                logger.info(f"Created Gemini cached content {cached_content.name}")
+            except (PermissionDenied, InvalidArgument) as e:
+                # Not permitted, or the context is below the model's minimum cacheable size
+                logger.warning(f"Gemini context caching unavailable for this context, sending it inline: {e}")
+                cached_content, expires_at = None, float("inf")
+            except Exception as e:
+                # Retry in a few minutes; fall back to the inline context meanwhile
+                logger.error(f"Error creating Gemini cached content: {e}")
+                cached_content, expires_at = None, time.time() + 300
+            _CACHED_CONTEXTS[context_hash] = (cached_content, expires_at)
             
-            return {
-                "response": response_text,
-                "conversation_id": conversation_id,
-                "model": self.model_name,
-                "processing_time": processing_time,
-                "timestamp": datetime.now().isoformat(),
-            }
+        if not cached_content:
+            return None
             
-        except Exception as e:
-            logger.error(f"Error in chat processing: {e}")
-            return {
-                "response": "I'm sorry, I encountered an error processing your request.",
-                "conversation_id": conversation_id,
-                "error": str(e),
-                "timestamp": datetime.now().isoformat(),
-            }
+        return _load_genai().GenerativeModel.from_cached_content(
+            cached_content=cached_content,
+            generation_config=self.generation_config,
+            safety_settings=self.safety_settings,
+        )
     
     def _format_history_for_gemini(self, history: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """Convert internal history format to Gemini API format."""
-        gemini_history = []
-        for message in history:
-            role = message.get("role", "")
-            content = message.get("content", "")
-            
-            # Skip system messages as they're handled differently
-            if role == "system":
-                continue
-            
-            # Map roles to Gemini format
-            if role == "user":
-                gemini_history.append({"role": "user", "parts": [content]})
-            elif role == "assistant":
-                gemini_history.append({"role": "model", "parts": [content]})
-        
-        return gemini_history
+        # System messages (and unknown roles) have no Gemini role and are skipped
+        return [
+            {"role": _GEMINI_ROLES[message["role"]], "parts": [message.get("content", "")]}
+            for message in history
+            if message.get("role") in _GEMINI_ROLES
+        ]
     
     def clear_conversation(self, conversation_id: str) -> None:
         """Clear a specific conversation from cache."""
@@ -544,93 +1149,136 @@ class GeminiTrainer:
             chatbot: An instance of GeminiChatbot
         """
         self.chatbot = chatbot
-        self.evaluation_results = []
+        # Most recent evaluation runs; runs not yet written by save_evaluation_results
+        self.evaluation_results = deque(maxlen=100)
+        self._unsaved_results = []
     
-    def evaluate_on_dataset(self, test_data: List[Dict[str, Any]], verbose: bool = True) -> Dict[str, Any]:
+    def evaluate_on_dataset(self, test_data: List[Dict[str, Any]], verbose: bool = True, concurrency: int = 16) -> Dict[str, Any]:
         """
         Evaluate the chatbot on a test dataset.
         
         Args:
             test_data: List of test examples, each with "query" and "expected" fields
             verbose: Whether to print evaluation progress
+            concurrency: Maximum number of examples sent to Gemini at once
             
         Returns:
             Dictionary with evaluation metrics
+            
+        Raises:
+            RuntimeError: If called from a running event loop; await
+                evaluate_on_dataset_async() there instead
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.evaluate_on_dataset_async(test_data, verbose, concurrency))
+        raise RuntimeError(
+            "evaluate_on_dataset() cannot run inside an event loop; "
+            "use 'await evaluate_on_dataset_async()' instead"
+        )
+    
+    async def evaluate_on_dataset_async(self, test_data: List[Dict[str, Any]], verbose: bool = True, concurrency: int = 16) -> Dict[str, Any]:
+        """
+        Evaluate the chatbot on a test dataset, running up to `concurrency` examples at once.
+        
+        Same arguments and result as evaluate_on_dataset(), for callers already inside
+        an event loop.
         """
+        semaphore = asyncio.Semaphore(concurrency)
+        outcomes = await asyncio.gather(*(
+            self._evaluate_example(i, example, len(test_data), verbose, semaphore)
+            for i, example in enumerate(test_data)
+        ), return_exceptions=True)
+        
+        # An example that raised counts as failed instead of aborting the whole evaluation
+        details = []
+        for example, outcome in zip(test_data, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error evaluating example: {outcome}")
+                outcome = {
+                    "query": example.get("query", ""),
+                    "response": "",
+                    "expected": example.get("expected", ""),
+                    "success": False,
+                    "processing_time": 0,
+                    "error": str(outcome),
+                }
+            details.append(outcome)
+        
         results = {
             "total_examples": len(test_data),
-            "successful": 0,
-            "failed": 0,
-            "details": [],
+            "successful": sum(1 for detail in details if detail["success"]),
+            "failed": sum(1 for detail in details if not detail["success"]),
+            "details": details,
             "avg_response_time": 0,
         }
         
-        total_time = 0
-        
-        for i, example in enumerate(test_data):
-            query = example.get("query", "")
-            expected = example.get("expected", "")
-            context = example.get("context", [])
-            
-            if verbose:
-                logger.info(f"Evaluating example {i+1}/{len(test_data)}")
-            
-            # Generate response
-            conversation_id = f"test_{i}_{int(time.time())}"
-            response_data = self.chatbot.chat(query, conversation_id, context)
-            
-            # Extract metrics
-            response_text = response_data.get("response", "")
-            processing_time = response_data.get("processing_time", 0)
-            total_time += processing_time
-            
-            # Simple exact match evaluation (can be replaced with more sophisticated metrics)
-            success = expected.lower() in response_text.lower()
-            
-            # Store result
-            detail = {
-                "query": query,
-                "response": response_text,
-                "expected": expected,
-                "success": success,
-                "processing_time": processing_time,
-            }
-            
-            results["details"].append(detail)
-            if success:
-                results["successful"] += 1
-            else:
-                results["failed"] += 1
-        
         # Calculate average response time
+        total_time = sum(detail["processing_time"] for detail in details)
         if results["total_examples"] > 0:
             results["avg_response_time"] = total_time / results["total_examples"]
         
         # Calculate success rate
         results["success_rate"] = results["successful"] / results["total_examples"] if results["total_examples"] > 0 else 0
         
-        self.evaluation_results.append({
+        evaluation = {
             "timestamp": datetime.now().isoformat(),
             "model": self.chatbot.model_name,
             "results": results
-        })
+        }
+        self.evaluation_results.append(evaluation)
+        self._unsaved_results.append(evaluation)
         
         return results
     
-    def save_evaluation_results(self, filename: str = "evaluation_results.json") -> None:
-        """Save evaluation results to a JSON file."""
+    async def _evaluate_example(self, i: int, example: Dict[str, Any], total: int, verbose: bool, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Run one test example and return its result detail."""
+        query = example.get("query", "")
+        expected = example.get("expected", "")
+        context = example.get("context", [])
+        
+        async with semaphore:
+            if verbose:
+                logger.info(f"Evaluating example {i+1}/{total}")
+            
+            # Generate response
+            conversation_id = f"test_{i}_{int(time.time())}"
+            response_data = await self.chatbot.chat_async(query, conversation_id, context)
+        
+        # Extract metrics
+        response_text = response_data.get("response", "")
+        processing_time = response_data.get("processing_time", 0)
+        
+        # Simple exact match evaluation (can be replaced with more sophisticated metrics)
+        success = expected.lower() in response_text.lower()
+        
+        return {
+            "query": query,
+            "response": response_text,
+            "expected": expected,
+            "success": success,
+            "processing_time": processing_time,
+        }
+    
+    def save_evaluation_results(self, filename: str = "evaluation_results.jsonl") -> None:
+        """Append the evaluation runs not saved yet to a JSON Lines file, one run per line."""
         try:
-            with open(filename, 'w') as f:
-                json.dump(self.evaluation_results, f, indent=2)
+            with open(filename, 'ab') as f:
+                f.writelines(_json_dumps(evaluation) + b"\n" for evaluation in self._unsaved_results)
+            self._unsaved_results.clear()
             logger.info(f"Evaluation results saved to {filename}")
         except Exception as e:
             logger.error(f"Error saving evaluation results: {e}")
     
     def load_test_dataset(self, filename: str) -> List[Dict[str, Any]]:
-        """Load test dataset from a JSON file."""
+        """Load test dataset from a JSON file, or a JSON Lines file (.jsonl) read line by line."""
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
+            with open(filename, 'rb') as f:
+                if filename.endswith(".jsonl"):
+                    data = [_json_loads(line) for line in f if line.strip()]
+                else:
+                    data = _json_loads(f.read())
             logger.info(f"Loaded test dataset with {len(data)} examples from {filename}")
             return data
         except Exception as e:
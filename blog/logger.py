@@ -1,6 +1,10 @@
 import os
+import atexit
 import json
 import logging
+import logging.handlers
+import queue
+import threading
 import time
 import uuid
 from datetime import datetime
@@ -8,18 +12,28 @@ from pathlib import Path
 from django.conf import settings
 import sys
 
-# Force UTF-8 encoding for all file operations
-if sys.platform == 'win32':
-    # Windows-specific fix for console output
-    import codecs
-    # Change console code page to UTF-8
-    os.system('chcp 65001 > nul')
-    sys.stdout.reconfigure(encoding='utf-8')
-    sys.stderr.reconfigure(encoding='utf-8')
+# Prefer orjson for serializing log data; falls back to the json module
+try:
+    import orjson
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+except ImportError:
+    orjson = None
+
+# Force UTF-8 encoding for console output on Windows, once per interpreter
+if sys.platform == 'win32' and not getattr(sys, '_scoop_utf8', False):
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except Exception:
+        pass
+    sys._scoop_utf8 = True
 
 def safe_message(message):
     """Make message safe for any console by replacing problematic characters"""
     if isinstance(message, str):
+        # Most log messages are plain ASCII already
+        if message.isascii():
+            return message
         # Replace non-ASCII chars with ASCII approximations for console display
         try:
             return message.encode('ascii', 'replace').decode('ascii')
@@ -30,8 +44,9 @@ def safe_message(message):
 class SafeFormatter(logging.Formatter):
     """Formatter that handles Unicode characters safely"""
     def format(self, record):
-        # Save original message
-        original_msg = record.getMessage()
+        # Save original message and arguments
+        original_msg = record.msg
+        original_args = record.args
         
         # Replace message with safe version for formatting
         if hasattr(record, 'msg') and isinstance(record.msg, str):
@@ -45,25 +60,74 @@ class SafeFormatter(logging.Formatter):
         
         # Restore original for file loggers that can handle Unicode
         record.msg = original_msg
+        record.args = original_args
         
         return formatted
 
-def get_safe_console_handler():
+# Record formats: per-process log files, and the console/daily logs shared by all processes
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+PROCESS_LOG_FORMAT = '%(asctime)s [%(levelname)s] [%(process_id)s] %(message)s'
+
+def get_safe_console_handler(fmt=LOG_FORMAT):
     """Create a console handler that safely handles Unicode characters"""
     handler = logging.StreamHandler()
-    formatter = SafeFormatter('%(asctime)s [%(levelname)s] %(message)s')
+    formatter = SafeFormatter(fmt)
     handler.setFormatter(formatter)
     return handler
 
-def get_utf8_file_handler(filename):
-    """Create a file handler with UTF-8 encoding"""
+class BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that flushes in batches instead of after every record.
+    
+    Output is flushed once about flush_size characters are pending or an ERROR record
+    is written, and synced to disk when the handler is closed.
+    """
+    def __init__(self, filename, mode='a', encoding=None, flush_size=65536):
+        super().__init__(filename, mode, encoding)
+        self.flush_size = flush_size
+        self._unflushed = 0
+    
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            msg = self.format(record) + self.terminator
+            self.stream.write(msg)
+            self._unflushed += len(msg)
+            if self._unflushed >= self.flush_size or record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self):
+        super().flush()
+        self._unflushed = 0
+    
+    def close(self):
+        self.acquire()
+        try:
+            if self.stream:
+                self.flush()
+                try:
+                    os.fsync(self.stream.fileno())
+                except OSError:
+                    pass
+        finally:
+            self.release()
+        super().close()
+
+def get_utf8_file_handler(filename, fmt=LOG_FORMAT, buffered=False):
+    """Create a file handler with UTF-8 encoding, batching flushes if buffered is set"""
+    handler_class = BufferedFileHandler if buffered else logging.FileHandler
     try:
         # Ensure parent directory exists
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         
         # Create handler with explicit UTF-8 encoding
-        handler = logging.FileHandler(filename, encoding='utf-8')
-        formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+        handler = handler_class(filename, encoding='utf-8')
+        formatter = logging.Formatter(fmt)
         handler.setFormatter(formatter)
         return handler
     except Exception as e:
@@ -72,15 +136,98 @@ def get_utf8_file_handler(filename):
         try:
             if not os.path.exists('logs'):
                 os.makedirs('logs')
-            handler = logging.FileHandler(f"logs/fallback_{datetime.now().strftime('%Y%m%d')}.log", 
+            handler = handler_class(f"logs/fallback_{datetime.now().strftime('%Y%m%d')}.log", 
                                          encoding='utf-8')
-            formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+            formatter = logging.Formatter(fmt)
             handler.setFormatter(formatter)
             return handler
         except:
             # Last resort: create a null handler that doesn't log anything
             return logging.NullHandler()
 
+# Daily log file handlers shared by every BlogProcessLogger in the process, by path
+_shared_file_handlers = {}
+_shared_file_handlers_lock = threading.Lock()
+
+def get_shared_utf8_file_handler(filename, fmt=PROCESS_LOG_FORMAT):
+    """
+    Get the UTF-8 file handler for a log file shared by all process loggers.
+    
+    The file is opened once per process instead of once per BlogProcessLogger. Handlers
+    for other (previous days') files are closed when a new file is first used.
+    """
+    with _shared_file_handlers_lock:
+        handler = _shared_file_handlers.get(filename)
+        if handler is None:
+            for old_handler in _shared_file_handlers.values():
+                old_handler.close()
+            _shared_file_handlers.clear()
+            handler = _shared_file_handlers[filename] = get_utf8_file_handler(filename, fmt)
+        return handler
+
+# Process loggers only enqueue records; a background listener thread writes them out.
+# The handlers each logger writes to, by logger name, are looked up by the listener.
+_log_handlers_by_logger = {}
+_log_queue = None
+_log_queue_pid = None
+_log_queue_lock = threading.Lock()
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread (the queue is in-process)"""
+    def prepare(self, record):
+        return record
+
+class _LoggerRoutingHandler(logging.Handler):
+    """Listener-side handler passing each record to the handlers of the logger that made it"""
+    def handle(self, record):
+        close_handler = getattr(record, 'close_handler', None)
+        if close_handler is not None:
+            # Queued by BlogProcessLogger.close, after all of that logger's records
+            for logger_name in record.close_loggers:
+                _log_handlers_by_logger.pop(logger_name, None)
+            close_handler.close()
+            return True
+        handlers = _log_handlers_by_logger.get(record.name)
+        if handlers is None:
+            # Logged after BlogProcessLogger.close: shown on the console instead of being lost
+            # (only the console logger's copy, the process logger repeats the same message)
+            if not record.name.startswith('blog_automation_'):
+                return True
+            handlers = (_get_unrouted_handler(),)
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+_unrouted_handler = None
+
+def _get_unrouted_handler():
+    """Console handler for records of process loggers that were already closed (listener thread only)"""
+    global _unrouted_handler
+    if _unrouted_handler is None:
+        _unrouted_handler = get_safe_console_handler(
+            '%(asctime)s [%(levelname)s] [%(process_id)s] (after end_process) %(message)s'
+        )
+    return _unrouted_handler
+
+def get_log_queue():
+    """
+    Get the queue process loggers write to, starting its listener thread on first use.
+    
+    A new queue and listener are created after a fork (Celery prefork workers), since
+    the parent's listener thread does not exist in the child.
+    """
+    global _log_queue, _log_queue_pid
+    with _log_queue_lock:
+        if _log_queue is None or _log_queue_pid != os.getpid():
+            _log_queue = queue.SimpleQueue()
+            _log_queue_pid = os.getpid()
+            listener = logging.handlers.QueueListener(_log_queue, _LoggerRoutingHandler())
+            listener.start()
+            # Write out whatever is still queued when the interpreter exits
+            atexit.register(listener.stop)
+        return _log_queue
+
 class BlogProcessLogger:
     """
     Logger class for tracking and logging the blog generation process with proper Unicode handling
@@ -88,47 +235,61 @@ class BlogProcessLogger:
     def __init__(self):
         self.process_id = uuid.uuid4().hex[:10]
         self.start_time = datetime.now()
-        self.steps = []
+        self._start_monotonic = time.monotonic()
+        # Steps by step ID, in the order they were started
+        self.steps = {}
         
         # Create log directory if it doesn't exist
         logs_dir = getattr(settings, 'LOGS_DIR', Path('logs'))
         os.makedirs(logs_dir, exist_ok=True)
         
-        # Main logger for console output
-        self.logger = logging.getLogger(f'blog_automation_{self.process_id}')
-        self.logger.setLevel(logging.INFO)
+        # Main logger for console output; records carry the process ID as a field
+        main_logger = logging.getLogger(f'blog_automation_{self.process_id}')
+        main_logger.setLevel(logging.INFO)
         
         # Clear existing handlers to avoid duplication
-        if self.logger.handlers:
-            self.logger.handlers.clear()
-        
-        # Add safe console handler
-        self.logger.addHandler(get_safe_console_handler())
+        if main_logger.handlers:
+            main_logger.handlers.clear()
         
-        # Add UTF-8 file handler
+        # Safe console handler and the UTF-8 file handler shared with other process loggers,
+        # written to by the log queue listener
         log_file = Path(logs_dir) / f'blog_process_{datetime.now().strftime("%Y%m%d")}.log'
-        self.logger.addHandler(get_utf8_file_handler(str(log_file)))
+        _log_handlers_by_logger[main_logger.name] = [
+            get_safe_console_handler(PROCESS_LOG_FORMAT),
+            get_shared_utf8_file_handler(str(log_file)),
+        ]
+        log_queue = get_log_queue()
+        main_logger.addHandler(_DeferredQueueHandler(log_queue))
+        self.logger = logging.LoggerAdapter(main_logger, {'process_id': self.process_id})
         
         # Detailed process logger (file only)
         process_log_dir = getattr(settings, 'PROCESS_LOG_DIR', Path('logs/processes'))
         os.makedirs(process_log_dir, exist_ok=True)
         
         self.process_log_path = Path(process_log_dir) / f'process_{self.process_id}.log'
-        self.process_logger = logging.getLogger(f'process_{self.process_id}')
-        self.process_logger.setLevel(logging.INFO)
+        process_logger = logging.getLogger(f'process_{self.process_id}')
+        process_logger.setLevel(logging.INFO)
         
         # Clear existing handlers to avoid duplication
-        if self.process_logger.handlers:
-            self.process_logger.handlers.clear()
+        if process_logger.handlers:
+            process_logger.handlers.clear()
         
-        # Add UTF-8 file handler
-        self.process_logger.addHandler(get_utf8_file_handler(str(self.process_log_path)))
+        # Add UTF-8 file handler, kept open until end_process, which flushes and syncs it
+        self._process_file_handler = get_utf8_file_handler(str(self.process_log_path), buffered=True)
+        _log_handlers_by_logger[process_logger.name] = [self._process_file_handler]
+        process_logger.addHandler(_DeferredQueueHandler(log_queue))
+        self.process_logger = logging.LoggerAdapter(process_logger, {'process_id': self.process_id})
         
         # Start logging
         self.info("Process started", {"process_id": self.process_id})
     
     def _safe_json_dumps(self, data):
         """Convert data to JSON string safely"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, default=str, option=_ORJSON_OPTIONS).decode('utf-8')
+            except TypeError:
+                pass
         try:
             return json.dumps(data, ensure_ascii=False)
         except:
@@ -140,115 +301,76 @@ class BlogProcessLogger:
                 # Last resort: convert to string
                 return str(data)
     
-    def info(self, message, data=None):
-        """Log an info message with optional data"""
+    def isEnabledFor(self, level):
+        """Check if a message of this level would be logged, to skip building costly log data"""
+        return self.logger.isEnabledFor(level) or self.process_logger.isEnabledFor(level)
+    
+    def _log(self, level, message, data=None, prefix=""):
+        """Log a message to the main and process loggers; data is only serialized if it will be logged"""
         try:
-            # Create safe versions for console display
-            safe_msg = safe_message(message)
-            
             # Log to main logger (will handle Unicode safely via formatter)
-            self.logger.info(f"[{self.process_id}] {message}")
+            self.logger.log(level, "%s%s", prefix, message)
             
             # For process logger (file), use full Unicode support
+            if not self.process_logger.isEnabledFor(level):
+                return
             if data:
-                data_str = f" - {self._safe_json_dumps(data)}"
-                self.process_logger.info(f"{message}{data_str}")
+                self.process_logger.log(level, "%s%s - %s", prefix, message, self._safe_json_dumps(data))
             else:
-                self.process_logger.info(message)
+                self.process_logger.log(level, "%s%s", prefix, message)
                 
         except Exception as e:
             # Fallback logging in case of errors
             print(f"Logging error: {str(e)} - Message: {safe_message(message)}")
     
+    def info(self, message, data=None):
+        """Log an info message with optional data"""
+        self._log(logging.INFO, message, data)
+    
     def warning(self, message, data=None):
         """Log a warning message with optional data"""
-        try:
-            # Log to main logger
-            self.logger.warning(f"[{self.process_id}] {message}")
-            
-            # For process logger (file)
-            if data:
-                data_str = f" - {self._safe_json_dumps(data)}"
-                self.process_logger.warning(f"{message}{data_str}")
-            else:
-                self.process_logger.warning(message)
-                
-        except Exception as e:
-            # Fallback logging
-            print(f"Logging error: {str(e)} - Message: {safe_message(message)}")
+        self._log(logging.WARNING, message, data)
     
     def error(self, message, data=None):
         """Log an error message with optional data"""
-        try:
-            # Log to main logger
-            self.logger.error(f"[{self.process_id}] {message}")
-            
-            # For process logger (file)
-            if data:
-                data_str = f" - {self._safe_json_dumps(data)}"
-                self.process_logger.error(f"{message}{data_str}")
-            else:
-                self.process_logger.error(message)
-                
-        except Exception as e:
-            # Fallback logging
-            print(f"Logging error: {str(e)} - Message: {safe_message(message)}")
+        self._log(logging.ERROR, message, data)
     
     def success(self, message, data=None):
         """Log a success message with optional data"""
-        try:
-            # Log to main logger
-            self.logger.info(f"[{self.process_id}] SUCCESS: {message}")
-            
-            # For process logger (file)
-            if data:
-                data_str = f" - {self._safe_json_dumps(data)}"
-                self.process_logger.info(f"SUCCESS: {message}{data_str}")
-            else:
-                self.process_logger.info(f"SUCCESS: {message}")
-                
-        except Exception as e:
-            # Fallback logging
-            print(f"Logging error: {str(e)} - Message: {safe_message(message)}")
+        self._log(logging.INFO, message, data, prefix="SUCCESS: ")
     
     def step(self, step_id, step_name):
         """Start a new step in the process and return the step ID"""
         step = {
             'id': step_id,
             'name': step_name,
-            'start_time': datetime.now().isoformat(),
+            'start_time': time.time(),
             'status': 'IN_PROGRESS'
         }
-        self.steps.append(step)
+        self.steps[step_id] = step
         self.info(f"Starting step: {step_name}", {'step_id': step_id})
         return step_id
     
     def complete_step(self, step_id, step_name, data=None):
         """Mark a step as completed"""
-        for step in self.steps:
-            if step['id'] == step_id:
-                step['end_time'] = datetime.now().isoformat()
-                step['status'] = 'COMPLETED'
-                step['data'] = data
-                break
+        step = self.steps.get(step_id)
+        if step:
+            step.update(end_time=time.time(), status='COMPLETED', data=data)
         
         self.info(f"Completed step: {step_name}", {'step_id': step_id, 'data': data})
     
     def fail_step(self, step_id, step_name, reason):
         """Mark a step as failed"""
-        for step in self.steps:
-            if step['id'] == step_id:
-                step['end_time'] = datetime.now().isoformat()
-                step['status'] = 'FAILED'
-                step['reason'] = reason
-                break
+        step = self.steps.get(step_id)
+        if step:
+            step.update(end_time=time.time(), status='FAILED', reason=reason)
         
         self.error(f"Failed step: {step_name}", {'step_id': step_id, 'reason': reason})
     
     def end_process(self, status, data=None):
         """End the process with a status and optional data"""
         end_time = datetime.now()
-        duration = (end_time - self.start_time).total_seconds()
+        duration = time.monotonic() - self._start_monotonic
         
         self.info(f"Process ended with status: {status}", {
             'duration_seconds': duration,
@@ -262,7 +384,7 @@ class BlogProcessLogger:
             'end_time': end_time.isoformat(),
             'duration_seconds': duration,
             'status': status,
-            'steps': self.steps,
+            'steps': [self._step_state(step) for step in self.steps.values()],
             'data': data
         }
         
@@ -272,7 +394,36 @@ class BlogProcessLogger:
             os.makedirs(logs_dir, exist_ok=True)
             
             json_path = Path(logs_dir) / f'process_{self.process_id}.json'
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(process_state, f, ensure_ascii=False, indent=2, default=str)
+            if orjson is not None:
+                with open(json_path, 'wb') as f:
+                    f.write(orjson.dumps(process_state, default=str, option=_ORJSON_OPTIONS | orjson.OPT_INDENT_2))
+            else:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump(process_state, f, ensure_ascii=False, indent=2, default=str)
         except Exception as e:
-            self.error(f"Failed to save process state: {str(e)}") 
\ No newline at end of file
+            self.error(f"Failed to save process state: {str(e)}")
+        
+        self.close()
+    
+    @staticmethod
+    def _step_state(step):
+        """Step record for the process state JSON, with its epoch times formatted as ISO strings"""
+        state = dict(step)
+        for key in ('start_time', 'end_time'):
+            if key in state:
+                state[key] = datetime.fromtimestamp(state[key]).isoformat()
+        return state
+    
+    def close(self):
+        """
+        Close this process's log file. Called by end_process.
+        
+        The file is closed, and this logger's handlers are unregistered, by the log queue
+        listener once the records queued before it are written. Anything logged afterwards
+        only goes to the console.
+        """
+        get_log_queue().put(logging.makeLogRecord({
+            'name': self.process_logger.logger.name,
+            'close_handler': self._process_file_handler,
+            'close_loggers': (self.logger.logger.name, self.process_logger.logger.name),
+        })) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand, CommandError
-from blog.automation import run_blog_automation_pipeline
+from blog.automation import run_blog_automation_batch, run_blog_automation_pipeline
 
 
 class Command(BaseCommand):
@@ -11,18 +11,37 @@ class Command(BaseCommand):
             action='store_true',
             help='Force execution even if there are recent blog posts',
         )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            metavar='SIZE',
+            help='Generate posts for up to SIZE topics in parallel on the Celery workers',
+        )
+        parser.add_argument(
+            '--lookback',
+            type=int,
+            default=1,
+            help='Hours back to look for trending topics in batch mode (default: 1)',
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write(self.style.SUCCESS('Starting blog automation pipeline...'))
-        
         try:
-            # Run the pipeline synchronously (not as a Celery task)
-            result = run_blog_automation_pipeline()
-            
+            if options['batch']:
+                # Dispatches a chord of generation tasks; needs running Celery workers
+                self.stdout.write(self.style.SUCCESS('Starting batch blog automation...'))
+                result = run_blog_automation_batch(
+                    lookback_hours=options['lookback'],
+                    batch_size=options['batch']
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS('Starting blog automation pipeline...'))
+                # Run the pipeline synchronously (not as a Celery task)
+                result = run_blog_automation_pipeline()
+
             if result.startswith('Success'):
                 self.stdout.write(self.style.SUCCESS(result))
             else:
                 self.stdout.write(self.style.WARNING(result))
-                
+
         except Exception as e:
-            raise CommandError(f'Blog automation pipeline failed: {e}') 
\ No newline at end of file
+            raise CommandError(f'Blog automation pipeline failed: {e}')
\ No newline at end of file
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2025-06-10 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_blogpost_fresh_approach_blogpost_is_fresh_variant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trendingtopic',
+            index=models.Index(fields=['processed', 'filtered_out', '-timestamp'], name='tt_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2025-06-12 08:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_trendingtopic_tt_recent_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trendingtopic',
+            index=models.Index(django.db.models.functions.text.Lower('keyword'), 'timestamp', name='tt_kwlower_ts_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils.text import slugify
 from django.utils import timezone
 import uuid
@@ -32,6 +33,10 @@ class TrendingTopic(models.Model):
     class Meta:
         ordering = ['-timestamp', 'rank']
         unique_together = ('keyword', 'timestamp', 'location')
+        indexes = [
+            models.Index(fields=['processed', 'filtered_out', '-timestamp'], name='tt_recent_idx'),
+            models.Index(Lower('keyword'), 'timestamp', name='tt_kwlower_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.keyword} (#{self.rank} in {self.location})"
@@ -104,7 +109,7 @@ class BlogPost(models.Model):
         """Publish this blog post"""
         self.status = 'published'
         self.published_at = timezone.now()
-        self.save()
+        self.save(update_fields=['status', 'published_at', 'updated_at'])
         
     @property
     def is_published(self):
@@ -202,11 +207,11 @@ class TopicFreshnessLog(models.Model):
         """Increment the occurrence count and update last_occurrence"""
         self.occurrence_count += 1
         self.last_occurrence = timezone.now()
-        self.save()
+        self.save(update_fields=['occurrence_count', 'last_occurrence'])
     
     def update_performance_metrics(self, success_score, seo_impact, engagement_lift):
         """Update performance metrics based on content performance"""
         self.strategy_success_score = success_score
         self.seo_impact = seo_impact
         self.engagement_lift = engagement_lift
-        self.save()
+        self.save(update_fields=['strategy_success_score', 'seo_impact', 'engagement_lift', 'last_occurrence'])
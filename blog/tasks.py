@@ -6,7 +6,9 @@ import requests
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
+from django.utils.text import slugify
 from django.db.models import Q, Count, Avg, F
+from django.db.models.functions import Lower
 from celery import shared_task
 from serpapi import GoogleSearch
 import re
@@ -25,19 +27,24 @@ else:
 
 
 @shared_task
-def fetch_trending_topics():
+def fetch_trending_topics(return_ids=False):
     """
     Fetches top 10 trending topics from the past 4 hours using SerpAPI (Google Trends)
     Improved to ensure reliable results and handle multiple API response formats
+    
+    Args:
+        return_ids: Return the primary keys of the stored topics instead of a status
+            message, so a chained task can load them directly
     """
     process_logger = BlogProcessLogger()
     process_logger.info("Starting enhanced trending topics fetch (past 4 hours)")
+    topic_ids = []
 
     if not hasattr(settings, 'SERPAPI_API_KEY') or not settings.SERPAPI_API_KEY:
         error_msg = "SERPAPI_API_KEY not configured in settings"
         process_logger.error(error_msg)
         process_logger.end_process("FAILED", {"reason": error_msg})
-        return f"Error: {error_msg}"
+        return topic_ids if return_ids else f"Error: {error_msg}"
 
     region = getattr(settings, 'SERP_API_REGION', 'US').lower()
     
@@ -226,7 +233,7 @@ def fetch_trending_topics():
                 existing_topic.timestamp = timezone.now()
                 if related_keywords_json:
                     existing_topic.related_keywords = related_keywords_json
-                existing_topic.save()
+                existing_topic.save(update_fields=['rank', 'search_volume', 'timestamp', 'related_keywords'])
                 
                 topic = existing_topic
                 process_logger.info(f"Updated existing topic: {keyword}")
@@ -284,7 +291,7 @@ def fetch_trending_topics():
         # If we didn't get enough topics, add some fallback evergreen topics
         if count < 5:
             process_logger.info(f"Only found {count} topics, adding fallback evergreen topics")
-            fallback_count = add_fallback_topics(process_logger, 10 - count)
+            fallback_count = add_fallback_topics(process_logger, 10 - count, added_ids=topic_ids)
             process_logger.info(f"Added {fallback_count} fallback topics")
             count += fallback_count
 
@@ -294,27 +301,33 @@ def fetch_trending_topics():
             "region": region,
             "search_method": search_method
         })
+        if return_ids:
+            return [topic["id"] for topic in stored_topics] + topic_ids
         return f"Successfully fetched {count} trending topics for the past 4 hours using {search_method}"
 
     except Exception as e:
         error_msg = f"Error fetching trending topics: {str(e)}"
         process_logger.error(error_msg)
-        process_logger.end_process("FAILED", {"error": str(e)})
         
         # If the fetch fails, add fallback topics to ensure the system keeps running
-        fallback_count = add_fallback_topics(process_logger, 10)
+        # (before end_process, which closes the logger)
+        fallback_count = add_fallback_topics(process_logger, 10, added_ids=topic_ids)
+        process_logger.end_process("FAILED", {"error": str(e), "fallback_count": fallback_count})
+        if return_ids:
+            return topic_ids
         if fallback_count > 0:
             return f"Error fetching trends, but added {fallback_count} fallback topics"
         
         return f"Error: {str(e)}"
 
-def add_fallback_topics(process_logger, count=5):
+def add_fallback_topics(process_logger, count=5, added_ids=None):
     """
     Add fallback evergreen topics when trend fetching fails or returns insufficient results
     
     Args:
         process_logger: Logger instance
         count: Number of fallback topics to add
+        added_ids: Optional list the primary keys of the added topics are appended to
     
     Returns:
         int: Number of fallback topics added
@@ -354,7 +367,7 @@ def add_fallback_topics(process_logger, count=5):
         
         if not existing:
             try:
-                TrendingTopic.objects.create(
+                fallback_topic = TrendingTopic.objects.create(
                     keyword=topic["keyword"],
                     rank=rank,
                     location="global",
@@ -363,6 +376,8 @@ def add_fallback_topics(process_logger, count=5):
                 )
                 process_logger.info(f"Added fallback topic: {topic['keyword']}")
                 added_count += 1
+                if added_ids is not None:
+                    added_ids.append(fallback_topic.id)
             except Exception as e:
                 process_logger.error(f"Error adding fallback topic: {str(e)}")
     
@@ -382,16 +397,19 @@ def process_trending_topics(limit=None):
     # Get unprocessed topics
     topics = TrendingTopic.objects.filter(processed=False, filtered_out=False).order_by('-timestamp')
     
-    if not topics.exists():
-        logger.info("No unprocessed trending topics found")
-        return "No unprocessed trending topics found"
-    
     # Apply limit if specified
     if limit and limit > 0:
         topics = topics[:limit]
         logger.info(f"Limited processing to {limit} topics")
     
-    total = topics.count()
+    # Materialized once - emptiness, count and iteration are derived from the list
+    topics = list(topics)
+    
+    if not topics:
+        logger.info("No unprocessed trending topics found")
+        return "No unprocessed trending topics found"
+    
+    total = len(topics)
     filtered = 0
     processed = 0
     
@@ -404,7 +422,7 @@ def process_trending_topics(limit=None):
             topic.filtered_out = True
             topic.filter_reason = "Too short"
             topic.processed = True
-            topic.save()
+            topic.save(update_fields=['filtered_out', 'filter_reason', 'processed'])
             filtered += 1
             continue
         
@@ -414,7 +432,7 @@ def process_trending_topics(limit=None):
             topic.filtered_out = True
             topic.filter_reason = "Contains banned words"
             topic.processed = True
-            topic.save()
+            topic.save(update_fields=['filtered_out', 'filter_reason', 'processed'])
             filtered += 1
             continue
             
@@ -426,7 +444,7 @@ def process_trending_topics(limit=None):
         
         # Mark as processed
         topic.processed = True
-        topic.save()
+        topic.save(update_fields=['processed'])
         processed += 1
         
         # Queue content generation for this topic
@@ -494,13 +512,13 @@ def select_best_trending_topic():
     logger.info("Selecting best trending topic for content generation")
     
     # Get processed topics that haven't been used for blog posts yet
-    topics = TrendingTopic.objects.filter(
+    topics = list(TrendingTopic.objects.filter(
         processed=True,
         filtered_out=False,
         blog_posts__isnull=True
-    ).order_by('-timestamp')[:10]  # Consider only recent topics
+    ).order_by('-timestamp')[:10])  # Consider only recent topics
     
-    if not topics.exists():
+    if not topics:
         logger.info("No suitable trending topics found")
         return "No suitable trending topics found"
     
@@ -675,16 +693,13 @@ def generate_blog_for_topic(topic_id, template_type, engagement_score=50, fresh_
         
         # Generate a slug from the title if not already set
         if not blog_post.slug:
-            slug = title.lower()
-            # Replace spaces with dashes and remove special characters
-            slug = re.sub(r'[^\w\s-]', '', slug)
-            slug = re.sub(r'[\s-]+', '-', slug)
-            blog_post.slug = slug
-            blog_post.save()
-        
-        # Mark the topic as processed
+            # Titles without ASCII words: keep their Unicode word characters in the slug
+            blog_post.slug = slugify(title, allow_unicode=True)
+            blog_post.save(update_fields=['slug', 'updated_at'])
+        
+        # Mark the topic as processed (single-column UPDATE)
         topic.processed = True
-        topic.save()
+        topic.save(update_fields=['processed'])
         
         # Update or create a TopicFreshnessLog entry if this is a fresh variant
         if is_fresh_variant:
@@ -703,7 +718,7 @@ def generate_blog_for_topic(topic_id, template_type, engagement_score=50, fresh_
                 log.increment_occurrence()
                 log.strategy_applied = fresh_content_strategy or 'different_angle'
                 log.strategy_notes = f"{log.strategy_notes}\nCreated fresh variant using template: {used_template_type} on {timezone.now().strftime('%Y-%m-%d %H:%M')}"
-                log.save()
+                log.save(update_fields=['strategy_applied', 'strategy_notes', 'last_occurrence'])
                 
             # Add this blog post to the log's related posts
             log.related_blog_posts.add(blog_post)
@@ -907,7 +922,7 @@ def parse_json_content(content, template_type):
         content = content.strip()
         
         # Handle any special characters that might cause encoding issues
-        content = content.encode('utf-8', 'ignore').decode('utf-8')
+        content = _utf8_safe(content)
         
         # Parse the JSON
         data = json.loads(content)
@@ -939,95 +954,106 @@ def parse_json_content(content, template_type):
         return None
 
 
+def _utf8_safe(text):
+    """
+    Drop characters that cannot be encoded as UTF-8 (lone surrogates from \\u escapes)
+    
+    ASCII text is returned as is, skipping the encode/decode round trip.
+    """
+    if text.isascii():
+        return text
+    return text.encode('utf-8', 'ignore').decode('utf-8')
+
+
 def format_json_to_html(content_data, template_type):
     """
     Converts the structured JSON content to formatted HTML
     based on the template type
     """
     try:
-        html = ""
+        html_parts = []
         
         # Add title as H1
         title = content_data.get('title', '')
-        title = title.encode('utf-8', 'ignore').decode('utf-8')
-        html += f"<h1>{title}</h1>\n\n"
+        title = _utf8_safe(title)
+        html_parts.append(f"<h1>{title}</h1>\n\n")
         
         # Add featured image if present
         if 'featured_image' in content_data and content_data['featured_image']:
             featured_image = content_data['featured_image']
-            alt_text = featured_image.get('alt_text', title).encode('utf-8', 'ignore').decode('utf-8')
-            search_terms = featured_image.get('search_terms', title).encode('utf-8', 'ignore').decode('utf-8')
+            alt_text = _utf8_safe(featured_image.get('alt_text', title))
+            search_terms = _utf8_safe(featured_image.get('search_terms', title))
             
             # Create placeholder image tag with data attributes for frontend processing
-            html += f'<div class="featured-image-container">\n'
-            html += f'  <img class="unsplash-image" data-search-terms="{search_terms}" alt="{alt_text}" data-placeholder="featured" />\n'
-            html += f'  <noscript>Featured image: {alt_text}</noscript>\n'
-            html += f'</div>\n\n'
+            html_parts.append(f'<div class="featured-image-container">\n')
+            html_parts.append(f'  <img class="unsplash-image" data-search-terms="{search_terms}" alt="{alt_text}" data-placeholder="featured" />\n')
+            html_parts.append(f'  <noscript>Featured image: {alt_text}</noscript>\n')
+            html_parts.append(f'</div>\n\n')
         
         # Add template-specific styling and structure
         if template_type == 'evergreen':
             # Add a table of contents for evergreen content
             toc_items = content_data.get('table_of_contents', [])
             if toc_items:
-                html += '<div class="table-of-contents-container">\n'
-                html += '<h2>Table of Contents</h2>\n'
-                html += '<ul class="table-of-contents">\n'
+                html_parts.append('<div class="table-of-contents-container">\n')
+                html_parts.append('<h2>Table of Contents</h2>\n')
+                html_parts.append('<ul class="table-of-contents">\n')
                 for item in toc_items:
-                    item_text = item.encode('utf-8', 'ignore').decode('utf-8')
+                    item_text = _utf8_safe(item)
                     # Create anchor link from item text
                     anchor = item_text.lower().replace(' ', '-').replace(',', '').replace('.', '')
-                    html += f'<li><a href="#{anchor}">{item_text}</a></li>\n'
-                html += '</ul>\n'
-                html += '</div>\n\n'
+                    html_parts.append(f'<li><a href="#{anchor}">{item_text}</a></li>\n')
+                html_parts.append('</ul>\n')
+                html_parts.append('</div>\n\n')
                 
         elif template_type == 'how_to':
             # Add a "What You'll Need" section if it's in the data
             if 'prerequisites' in content_data:
-                html += '<div class="prerequisites-container">\n'
-                html += '<h2>What You\'ll Need</h2>\n'
-                html += '<ul class="prerequisites-list">\n'
+                html_parts.append('<div class="prerequisites-container">\n')
+                html_parts.append('<h2>What You\'ll Need</h2>\n')
+                html_parts.append('<ul class="prerequisites-list">\n')
                 for item in content_data.get('prerequisites', []):
-                    item_text = item.encode('utf-8', 'ignore').decode('utf-8')
-                    html += f'<li>{item_text}</li>\n'
-                html += '</ul>\n'
-                html += '</div>\n\n'
+                    item_text = _utf8_safe(item)
+                    html_parts.append(f'<li>{item_text}</li>\n')
+                html_parts.append('</ul>\n')
+                html_parts.append('</div>\n\n')
                 
         elif template_type == 'comparison':
             # Add a comparison table if it's in the data
             if 'comparison_table' in content_data:
-                html += '<div class="comparison-table-container">\n'
-                html += '<h2>Comparison At A Glance</h2>\n'
-                html += '<table class="comparison-table">\n'
+                html_parts.append('<div class="comparison-table-container">\n')
+                html_parts.append('<h2>Comparison At A Glance</h2>\n')
+                html_parts.append('<table class="comparison-table">\n')
                 
                 # Add table header
-                html += '<thead><tr>\n'
+                html_parts.append('<thead><tr>\n')
                 for header in content_data['comparison_table'].get('headers', []):
-                    header_text = header.encode('utf-8', 'ignore').decode('utf-8')
-                    html += f'<th>{header_text}</th>\n'
-                html += '</tr></thead>\n'
+                    header_text = _utf8_safe(header)
+                    html_parts.append(f'<th>{header_text}</th>\n')
+                html_parts.append('</tr></thead>\n')
                 
                 # Add table body
-                html += '<tbody>\n'
+                html_parts.append('<tbody>\n')
                 for row in content_data['comparison_table'].get('rows', []):
-                    html += '<tr>\n'
+                    html_parts.append('<tr>\n')
                     for cell in row:
-                        cell_text = cell.encode('utf-8', 'ignore').decode('utf-8')
-                        html += f'<td>{cell_text}</td>\n'
-                    html += '</tr>\n'
-                html += '</tbody>\n'
-                html += '</table>\n'
-                html += '</div>\n\n'
+                        cell_text = _utf8_safe(cell)
+                        html_parts.append(f'<td>{cell_text}</td>\n')
+                    html_parts.append('</tr>\n')
+                html_parts.append('</tbody>\n')
+                html_parts.append('</table>\n')
+                html_parts.append('</div>\n\n')
                 
         elif template_type == 'local':
             # Add a local information box if available
             if 'local_info' in content_data:
                 local_info = content_data['local_info']
-                html += '<div class="local-info-container">\n'
-                html += f'<h2>Local Information: {local_info.get("location", "")}</h2>\n'
-                html += '<div class="local-info-content">\n'
-                html += f'<p>{local_info.get("description", "")}</p>\n'
-                html += '</div>\n'
-                html += '</div>\n\n'
+                html_parts.append('<div class="local-info-container">\n')
+                html_parts.append(f'<h2>Local Information: {local_info.get("location", "")}</h2>\n')
+                html_parts.append('<div class="local-info-content">\n')
+                html_parts.append(f'<p>{local_info.get("description", "")}</p>\n')
+                html_parts.append('</div>\n')
+                html_parts.append('</div>\n\n')
         
         # Process each section
         for section in content_data.get('sections', []):
@@ -1036,107 +1062,107 @@ def format_json_to_html(content_data, template_type):
             if section_type == 'introduction':
                 # Introduction section
                 if 'h1' in section and section['h1'] != content_data.get('title', ''):
-                    h1 = section.get('h1', '').encode('utf-8', 'ignore').decode('utf-8')
-                    html += f"<h2>{h1}</h2>\n"
-                content_text = section.get('content', '').encode('utf-8', 'ignore').decode('utf-8')
-                html += f"<p>{content_text}</p>\n\n"
+                    h1 = _utf8_safe(section.get('h1', ''))
+                    html_parts.append(f"<h2>{h1}</h2>\n")
+                content_text = _utf8_safe(section.get('content', ''))
+                html_parts.append(f"<p>{content_text}</p>\n\n")
                 
                 # Add section image if present
                 if 'image' in section and section['image']:
-                    html = add_section_image(html, section['image'])
+                    html_parts.append(_section_image_html(section['image']))
             
             elif section_type == 'conclusion':
                 # Conclusion section
-                h2 = section.get('h2', 'Conclusion').encode('utf-8', 'ignore').decode('utf-8')
-                content_text = section.get('content', '').encode('utf-8', 'ignore').decode('utf-8')
-                html += f"<h2>{h2}</h2>\n"
-                html += f"<p>{content_text}</p>\n\n"
+                h2 = _utf8_safe(section.get('h2', 'Conclusion'))
+                content_text = _utf8_safe(section.get('content', ''))
+                html_parts.append(f"<h2>{h2}</h2>\n")
+                html_parts.append(f"<p>{content_text}</p>\n\n")
                 
                 # Add section image if present
                 if 'image' in section and section['image']:
-                    html = add_section_image(html, section['image'])
+                    html_parts.append(_section_image_html(section['image']))
             
             else:
                 # Regular section
                 if 'h2' in section:
-                    h2 = section.get('h2', '').encode('utf-8', 'ignore').decode('utf-8')
+                    h2 = _utf8_safe(section.get('h2', ''))
                     # For evergreen content, add anchors for TOC
                     if template_type == 'evergreen':
                         anchor = h2.lower().replace(' ', '-').replace(',', '').replace('.', '')
-                        html += f'<h2 id="{anchor}">{h2}</h2>\n'
+                        html_parts.append(f'<h2 id="{anchor}">{h2}</h2>\n')
                     else:
-                        html += f"<h2>{h2}</h2>\n"
+                        html_parts.append(f"<h2>{h2}</h2>\n")
                 
                 # Add section image with appropriate placement
                 if 'image' in section and section['image']:
                     placement = section['image'].get('placement', 'center')
                     if placement == 'left':
-                        html = add_section_image(html, section['image'], "float-left mr-4 mb-4")
+                        html_parts.append(_section_image_html(section['image'], "float-left mr-4 mb-4"))
                     elif placement == 'right':
-                        html = add_section_image(html, section['image'], "float-right ml-4 mb-4")
+                        html_parts.append(_section_image_html(section['image'], "float-right ml-4 mb-4"))
                     else:  # center
-                        html = add_section_image(html, section['image'], "mx-auto my-4 block")
+                        html_parts.append(_section_image_html(section['image'], "mx-auto my-4 block"))
                 
                 if 'content' in section:
-                    content_text = section.get('content', '').encode('utf-8', 'ignore').decode('utf-8')
-                    html += f"<p>{content_text}</p>\n\n"
+                    content_text = _utf8_safe(section.get('content', ''))
+                    html_parts.append(f"<p>{content_text}</p>\n\n")
                 
                 # Process subsections if present
                 for subsection in section.get('subsections', []):
                     if 'h3' in subsection:
-                        h3 = subsection.get('h3', '').encode('utf-8', 'ignore').decode('utf-8')
-                        html += f"<h3>{h3}</h3>\n"
+                        h3 = _utf8_safe(subsection.get('h3', ''))
+                        html_parts.append(f"<h3>{h3}</h3>\n")
                     
                     if 'content' in subsection:
-                        content_text = subsection.get('content', '').encode('utf-8', 'ignore').decode('utf-8')
-                        html += f"<p>{content_text}</p>\n\n"
+                        content_text = _utf8_safe(subsection.get('content', ''))
+                        html_parts.append(f"<p>{content_text}</p>\n\n")
                     
                     # Add subsection image if present
                     if 'image' in subsection and subsection['image']:
                         placement = subsection['image'].get('placement', 'center')
                         if placement == 'left':
-                            html = add_section_image(html, subsection['image'], "float-left mr-4 mb-4")
+                            html_parts.append(_section_image_html(subsection['image'], "float-left mr-4 mb-4"))
                         elif placement == 'right':
-                            html = add_section_image(html, subsection['image'], "float-right ml-4 mb-4")
+                            html_parts.append(_section_image_html(subsection['image'], "float-right ml-4 mb-4"))
                         else:  # center
-                            html = add_section_image(html, subsection['image'], "mx-auto my-4 block")
+                            html_parts.append(_section_image_html(subsection['image'], "mx-auto my-4 block"))
                     
                     # Process list items if present
                     if 'list_items' in subsection and subsection['list_items']:
-                        html += "<ul>\n"
+                        html_parts.append("<ul>\n")
                         for item in subsection['list_items']:
-                            item_text = item.encode('utf-8', 'ignore').decode('utf-8')
-                            html += f"<li>{item_text}</li>\n"
-                        html += "</ul>\n\n"
+                            item_text = _utf8_safe(item)
+                            html_parts.append(f"<li>{item_text}</li>\n")
+                        html_parts.append("</ul>\n\n")
         
         # Add FAQ section if present
         if 'faq' in content_data and content_data['faq']:
-            html += "<h2>Frequently Asked Questions</h2>\n"
-            html += "<div class='faq-section'>\n"
+            html_parts.append("<h2>Frequently Asked Questions</h2>\n")
+            html_parts.append("<div class='faq-section'>\n")
             
             for qa in content_data['faq']:
-                question = qa.get('question', '').encode('utf-8', 'ignore').decode('utf-8')
-                answer = qa.get('answer', '').encode('utf-8', 'ignore').decode('utf-8')
+                question = _utf8_safe(qa.get('question', ''))
+                answer = _utf8_safe(qa.get('answer', ''))
                 
-                html += f"<div class='faq-item'>\n"
-                html += f"<h3>{question}</h3>\n"
-                html += f"<p>{answer}</p>\n"
-                html += "</div>\n\n"
+                html_parts.append(f"<div class='faq-item'>\n")
+                html_parts.append(f"<h3>{question}</h3>\n")
+                html_parts.append(f"<p>{answer}</p>\n")
+                html_parts.append("</div>\n\n")
                 
-            html += "</div>\n"
+            html_parts.append("</div>\n")
         
         # Add call to action for all templates
         if 'call_to_action' in content_data:
             cta = content_data['call_to_action']
-            cta_text = cta.get('text', 'Learn More').encode('utf-8', 'ignore').decode('utf-8')
-            cta_url = cta.get('url', '#').encode('utf-8', 'ignore').decode('utf-8')
+            cta_text = _utf8_safe(cta.get('text', 'Learn More'))
+            cta_url = _utf8_safe(cta.get('url', '#'))
             
-            html += f'<div class="call-to-action-container">\n'
-            html += f'<a href="{cta_url}" class="cta-button">{cta_text}</a>\n'
-            html += f'</div>\n\n'
+            html_parts.append(f'<div class="call-to-action-container">\n')
+            html_parts.append(f'<a href="{cta_url}" class="cta-button">{cta_text}</a>\n')
+            html_parts.append(f'</div>\n\n')
         
         # Append these CSS styles to the existing style block in format_json_to_html
-        html += """
+        html_parts.append("""
 <style>
 .float-left {
     float: left;
@@ -1260,9 +1286,9 @@ def format_json_to_html(content_data, template_type):
     background-color: #4338ca;
 }
 </style>
-"""
+""")
         
-        return html
+        return ''.join(html_parts)
     except Exception as e:
         logger.error(f"Error formatting JSON to HTML: {e}")
         return ""
@@ -1270,9 +1296,14 @@ def format_json_to_html(content_data, template_type):
 
 def add_section_image(html, image_data, css_classes=""):
     """Helper function to add an image to the HTML content"""
+    return html + _section_image_html(image_data, css_classes)
+
+
+def _section_image_html(image_data, css_classes=""):
+    """HTML for a section image placeholder (empty if the image data is unusable)"""
     try:
-        alt_text = image_data.get('alt_text', '').encode('utf-8', 'ignore').decode('utf-8')
-        search_terms = image_data.get('search_terms', '').encode('utf-8', 'ignore').decode('utf-8')
+        alt_text = _utf8_safe(image_data.get('alt_text', ''))
+        search_terms = _utf8_safe(image_data.get('search_terms', ''))
         
         # Create image tag with data attributes for frontend processing
         image_html = f'<div class="section-image-container">\n'
@@ -1280,10 +1311,10 @@ def add_section_image(html, image_data, css_classes=""):
         image_html += f'  <noscript>Image: {alt_text}</noscript>\n'
         image_html += f'</div>\n\n'
         
-        return html + image_html
+        return image_html
     except Exception as e:
         logger.error(f"Error adding section image: {e}")
-        return html
+        return ""
 
 
 def generate_seo_prompt(keyword, template_type):
@@ -1429,16 +1460,21 @@ def generate_blog_content(limit_lookback=24):
         topics_last_period = TrendingTopic.objects.filter(
             timestamp__gte=timezone.now() - timedelta(hours=recent_hours),
             processed=True
-        ).order_by('-timestamp')
+        )
         
-        # Extract unique keywords from recent topics
-        recent_keywords = list(set([t.keyword.lower() for t in topics_last_period]))
+        # Unique lowercased keywords from recent topics with their occurrence counts,
+        # deduplicated and counted in the database instead of per keyword in Python
+        keyword_counts = (
+            topics_last_period
+            .annotate(keyword_lower=Lower('keyword'))
+            .values_list('keyword_lower')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
         
         # Track duplicates and their occurrence counts
         duplicate_topics = {}
-        for keyword in recent_keywords:
-            # Count how many times this topic appeared in the recent period
-            count = topics_last_period.filter(keyword__iexact=keyword).count()
+        for keyword, count in keyword_counts:
             if count >= 2:  # Topic appeared in 2 or more consecutive runs
                 duplicate_topics[keyword] = count
                 logger.info(f"Detected duplicate trending topic: {keyword} (appeared {count} times in last {recent_hours} hours)")
@@ -1454,17 +1490,20 @@ def generate_blog_content(limit_lookback=24):
             topics_with_recent_blogs = []
             
             for keyword in duplicate_topics.keys():
-                # Find blogs for this topic in the recent hours
-                recent_blogs = BlogPost.objects.filter(
-                    trending_topic__keyword__iexact=keyword,
+                # Find blogs for this topic in the recent hours (only the template column is used).
+                # keyword is already lowercased; matching on Lower() can use tt_kwlower_ts_idx
+                blog_templates = list(BlogPost.objects.alias(
+                    topic_keyword_lower=Lower('trending_topic__keyword')
+                ).filter(
+                    topic_keyword_lower=keyword,
                     created_at__gte=timezone.now() - timedelta(hours=recent_blog_hours)
-                )
+                ).values_list('template_type', flat=True))
                 
-                if recent_blogs.exists():
+                if blog_templates:
                     topics_with_recent_blogs.append({
                         "keyword": keyword,
-                        "blog_count": recent_blogs.count(),
-                        "blog_templates": list(recent_blogs.values_list('template_type', flat=True))
+                        "blog_count": len(blog_templates),
+                        "blog_templates": blog_templates
                     })
             
             if topics_with_recent_blogs:
@@ -1478,10 +1517,12 @@ def generate_blog_content(limit_lookback=24):
                 recent_topic_keywords = [t["keyword"].lower() for t in topics_with_recent_blogs]
                 alternative_topics = trending_topics.exclude(keyword__iregex=r'(' + '|'.join(recent_topic_keywords) + ')')
                 
-                if alternative_topics.exists():
+                selected_topic = alternative_topics.first()
+                if selected_topic:
                     # We found alternative topics that haven't been covered recently
-                    logger.info(f"Found {alternative_topics.count()} alternative topics that haven't been covered recently")
-                    selected_topic = alternative_topics.first()
+                    # (the COUNT query only runs when info logging is enabled)
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(f"Found {alternative_topics.count()} alternative topics that haven't been covered recently")
                 else:
                     # No alternative topics, must use a duplicate but with fresh content
                     logger.info("No alternative topics found, will create fresh content for a duplicate topic")
@@ -1555,7 +1596,7 @@ The goal is to create a blog that feels completely fresh even though the topic h
         
         # Mark this topic as processed
         selected_topic.processed = True
-        selected_topic.save()
+        selected_topic.save(update_fields=['processed'])
         
         # Generate the blog
         generate_blog_for_topic.delay(selected_topic.id, template_type, engagement_score=calculate_engagement_potential(selected_topic.keyword), fresh_content_strategy=fresh_content_strategy)
@@ -1577,18 +1618,12 @@ def publish_scheduled_blogs():
     
     now = timezone.now()
     
-    # Find blog posts that are scheduled and whose scheduled time has passed
-    scheduled_posts = BlogPost.objects.filter(
+    # Publish blog posts that are scheduled and whose scheduled time has passed
+    # with a single UPDATE (save() would set nothing beyond these fields)
+    count = BlogPost.objects.filter(
         status='scheduled',
         scheduled_at__lte=now
-    )
-    
-    count = 0
-    for post in scheduled_posts:
-        post.status = 'published'
-        post.published_at = now
-        post.save()
-        count += 1
+    ).update(status='published', published_at=now, updated_at=now)
     
     logger.info(f"Published {count} scheduled blog posts")
     return f"Published {count} scheduled blog posts"
@@ -1776,12 +1811,9 @@ def create_and_publish_blog(keyword, template_type=None, publish_immediately=Tru
         
         # Generate a slug from the title if not already set
         if not blog_post.slug:
-            slug = title.lower()
-            # Replace spaces with dashes and remove special characters
-            slug = re.sub(r'[^\w\s-]', '', slug)
-            slug = re.sub(r'[\s-]+', '-', slug)
-            blog_post.slug = slug
-            blog_post.save()
+            # Titles without ASCII words: keep their Unicode word characters in the slug
+            blog_post.slug = slugify(title, allow_unicode=True)
+            blog_post.save(update_fields=['slug', 'updated_at'])
         
         process_logger.complete_step(step4, "CREATE_BLOG_POST", {
             "blog_id": str(blog_post.id),
@@ -1881,12 +1913,13 @@ def update_freshness_metrics():
         from django.db.models import Avg, Count, F, Q
         
         # Get logs that have multiple occurrences
-        duplicate_logs = TopicFreshnessLog.objects.filter(
+        # Materialized once - the loop below needs every row anyway, so no separate COUNT query
+        duplicate_logs = list(TopicFreshnessLog.objects.filter(
             occurrence_count__gte=2,  # Topics that appeared multiple times
             strategy_applied__in=['different_angle', 'new_template', 'latest_data', 'audience_shift']  # Only where a freshness strategy was applied
-        )
+        ))
         
-        logger.info(f"Found {duplicate_logs.count()} topics with multiple occurrences and freshness strategies")
+        logger.info(f"Found {len(duplicate_logs)} topics with multiple occurrences and freshness strategies")
         
         metrics_updated = 0
         
@@ -1902,8 +1935,10 @@ def update_freshness_metrics():
             avg_time_on_page = related_posts.aggregate(Avg('avg_time_on_page'))['avg_time_on_page__avg'] or 0
             
             # Get regular (non-fresh) posts for the same keyword for comparison
-            regular_posts = BlogPost.objects.filter(
-                trending_topic__keyword__iexact=log.keyword,
+            regular_posts = BlogPost.objects.alias(
+                topic_keyword_lower=Lower('trending_topic__keyword')
+            ).filter(
+                topic_keyword_lower=log.keyword.lower(),
                 is_fresh_variant=False
             )
             
@@ -1983,13 +2018,13 @@ def update_freshness_metrics():
                 else:
                     # Update existing log
                     log.occurrence_count = max(log.occurrence_count, count)  # Keep the higher count
-                    log.save()
+                    log.save(update_fields=['occurrence_count', 'last_occurrence'])
                     logs_updated += 1
                 
                 # Link related blog posts if not already linked
-                related_posts = BlogPost.objects.filter(
-                    trending_topic__keyword__iexact=keyword
-                )
+                related_posts = BlogPost.objects.alias(
+                    topic_keyword_lower=Lower('trending_topic__keyword')
+                ).filter(topic_keyword_lower=keyword.lower())
                 
                 for post in related_posts:
                     if post not in log.related_blog_posts.all():
@@ -4,12 +4,16 @@ Utility functions for blog template standardization and processing.
 import os
 import logging
 import re
+import tempfile
 from django.conf import settings
 from django.template.loader import get_template
 from django.utils.safestring import mark_safe
 
 logger = logging.getLogger(__name__)
 
+# Records the template mtime of the last standardize_templates() pass
+TEMPLATES_STAMP_PATH = os.path.join(tempfile.gettempdir(), 'scoop_tpl.stamp')
+
 def convert_content_to_template(content, template_type):
     """
     Converts JSON content data to HTML using the appropriate template
@@ -161,14 +165,45 @@ def format_content_to_html(content, template_type):
     # Return the combined HTML with proper marks_safe for Django templates
     return mark_safe('\n'.join(html))
 
+def _templates_mtime(templates_dir):
+    """Latest modification time of the blog templates directory and its HTML files"""
+    mtimes = [os.path.getmtime(templates_dir)]
+    mtimes.extend(
+        os.path.getmtime(os.path.join(templates_dir, f))
+        for f in os.listdir(templates_dir) if f.endswith('.html')
+    )
+    return repr(max(mtimes))
+
+def _read_templates_stamp():
+    """Read the template mtime recorded by the last standardization pass"""
+    try:
+        with open(TEMPLATES_STAMP_PATH, 'r') as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+def _write_templates_stamp(templates_dir):
+    """Record the current template mtime so unchanged templates are not re-processed"""
+    try:
+        with open(TEMPLATES_STAMP_PATH, 'w') as file:
+            file.write(_templates_mtime(templates_dir))
+    except OSError as e:
+        logger.warning(f"Could not write templates stamp {TEMPLATES_STAMP_PATH}: {e}")
+
 def standardize_templates():
     """
     Standardizes all blog templates in the blog_templates folder
     to use the header and footer includes
+    
+    Skipped when no template has changed since the last pass.
     """
     templates_dir = os.path.join(settings.BASE_DIR, 'templates', 'blog_templates')
     
     try:
+        if _read_templates_stamp() == _templates_mtime(templates_dir):
+            logger.info("Blog templates unchanged since last standardization, skipping")
+            return
+        
         # Skip the header and footer templates themselves
         template_files = [f for f in os.listdir(templates_dir) 
                          if f.endswith('.html') and f not in ['header.html', 'footer.html']]
@@ -292,5 +327,8 @@ def standardize_templates():
                         break
                     except Exception as e:
                         continue
+        
+        # Stamp after writing, so the rewritten files count as processed
+        _write_templates_stamp(templates_dir)
     except Exception as e:
         logger.error(f"Error standardizing templates: {e}") 
\ No newline at end of file
@@ -15,7 +15,7 @@ from .models import BlogPost, AdPlacement, ContentPerformanceLog, TrendingTopic
 from .tasks import update_blog_analytics, create_and_publish_blog
 from django.utils import timezone
 from datetime import timedelta
-from .automation import BlogProcessLogger
+from .logger import BlogProcessLogger
 from django.conf import settings
 import os
 from django.db import models
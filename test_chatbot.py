@@ -76,8 +76,8 @@ def main():
     print(f"Average response time: {results['avg_response_time']:.2f}s")
     
     # Save evaluation results
-    trainer.save_evaluation_results("test_results.json")
-    print("Evaluation results saved to test_results.json")
+    trainer.save_evaluation_results("test_results.jsonl")
+    print("Evaluation results saved to test_results.jsonl")
     
     print("\n=== Testing complete ===")
 